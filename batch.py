@@ -0,0 +1,104 @@
+from multiprocessing.connection import wait
+import multiprocessing
+import time
+import os
+
+from regos import RegexGenerator
+
+def group_records(records, key = 'modelId'):
+    r"""
+    Groups data dictionaries by value of ``key``
+
+    Arguments:
+
+    records (iterable): dictionaries in format accepted by ``RegexGenerator.parse_data``
+    key (str or callable, optional): key of dictionary or function returning group of dictionary. (default: ``'modelId'``)
+
+    Returns:
+
+    (dict): dictionary mapping group to list of its dictionaries
+    """
+    groups = {}
+    for record in records:
+        group = key(record) if callable(key) else record.get(key)
+        groups.setdefault(group, []).append(record)
+    return groups
+
+def train_group(records, parse_kwargs, evolve_kwargs, connection):
+    r"""Trains single ``RegexGenerator`` in worker process and sends tuple (success, regex or error message) through ``connection``"""
+    try:
+        generator = RegexGenerator()
+        generator.parse_data(records, **parse_kwargs)
+        connection.send((True, generator.evolve(**evolve_kwargs)))
+    except Exception as ex:
+        connection.send((False, repr(ex)))
+    finally:
+        connection.close()
+
+def train_many(records, key = 'modelId', parse_kwargs = None, evolve_kwargs = None, max_workers = None, timeout = None):
+    r"""
+    Trains one extractor per group of ``records`` in a pool of processes.
+
+    Arguments:
+
+    records (iterable): dictionaries in format accepted by ``RegexGenerator.parse_data``, possibly mixing many extractors
+    key (str or callable, optional): key of dictionary or function returning group of dictionary. (default: ``'modelId'``)
+    parse_kwargs (dict, optional): keyword arguments of ``RegexGenerator.parse_data``. (default: ``None``)
+    evolve_kwargs (dict, optional): keyword arguments of ``RegexGenerator.evolve``. (default: ``None``)
+    max_workers (int, optional): maximal number of jobs running at once, number of processors if not set. (default: ``None``)
+    timeout (float, optional): if set - jobs running longer than ``timeout`` seconds are terminated. (default: ``None``)
+
+    Returns:
+
+    (tuple): (results, failures) - dictionaries mapping group to result of ``evolve`` and to error message respectively
+
+    Example:
+
+    >>> results, failures = train_many(data, parse_kwargs={'alternative_keys': ['inputData', 'selectedSubStrings']}, timeout=60)
+    """
+    parse_kwargs = parse_kwargs or {}
+    evolve_kwargs = evolve_kwargs or {}
+    max_workers = max_workers or os.cpu_count() or 1
+
+    jobs = list(group_records(records, key).items())
+    results, failures = {}, {}
+    running = {} # maps receiving end of pipe to (group, process, start time)
+
+    while jobs or running:
+        while jobs and len(running) < max_workers:
+            group, group_data = jobs.pop(0)
+            receiver, sender = multiprocessing.Pipe(duplex=False)
+            process = multiprocessing.Process(target=train_group, args=(group_data, parse_kwargs, evolve_kwargs, sender), daemon=True)
+            process.start()
+            sender.close()
+            running[receiver] = (group, process, time.monotonic())
+
+        wait_time = None
+        if timeout is not None:
+            wait_time = max(0, min(start for _, _, start in running.values()) + timeout - time.monotonic())
+
+        for receiver in wait(list(running), wait_time):
+            group, process, start = running.pop(receiver)
+            try:
+                success, value = receiver.recv()
+            except EOFError:
+                process.join()
+                success, value = False, f'worker exited with code {process.exitcode}'
+            receiver.close()
+            process.join()
+            if success:
+                results[group] = value
+            else:
+                failures[group] = value
+
+        if timeout is not None:
+            now = time.monotonic()
+            for receiver, (group, process, start) in list(running.items()):
+                if now - start >= timeout:
+                    process.terminate()
+                    process.join()
+                    receiver.close()
+                    del running[receiver]
+                    failures[group] = f'timed out after {timeout} seconds'
+
+    return results, failures
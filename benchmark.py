@@ -0,0 +1,259 @@
+from contextlib import redirect_stdout
+import tracemalloc
+import argparse
+import platform
+import random
+import json
+import time
+import io
+
+from extractor import MultiExtractor
+from regos import RegexGenerator
+
+KEYS = ['inputData', 'selectedSubStrings']
+
+FIELD_PATTERNS = { # fields of synthetic documents, in style of regexes returned by ``RegexGenerator.evolve``
+    'vid': r'VID: ([\w./]*) , S',
+    'pid': r'PID: (\S+)',
+    'sn': r'SN: (\w+)',
+    'name': r'NAME: "([^"]*)"',
+    'descr': r'DESCR: "([^"]*)"',
+    'interface': r'([A-Za-z]{2}\d/\d{1,2}) ',
+    'uplink': r'uplink to (\w+/\d)',
+    'loopback': r'Lo(\d+) is',
+}
+
+def inventory_document(rnd, length, selections, ambiguity):
+    r"""
+    Creates synthetic ``show inventory`` output with ``selections`` selected ``VID`` values
+
+    Arguments:
+
+    rnd (random.Random): source of randomness
+    length (int): approximate length of document, it is padded with banner lines
+    selections (int): number of inventory items, ``VID`` of each one is selected
+    ambiguity (float): probability that item contains decoy field with context similar to ``VID`` which is not selected
+
+    Returns:
+
+    (dict): dictionary with ``inputData`` and ``selectedSubStrings`` (inclusive end)
+    """
+    text = ''
+    spans = []
+    for item in range(selections):
+        pid = rnd.choice(['C1111-8PLTEEA', 'C1111-4P', 'PWR-12V', 'C1111-2x1GE', 'CISCO881-K9', 'EM7455/EM7430'])
+        text += f'NAME: "module {item}", DESCR: "Cisco {pid} Module" PID: {pid} , '
+        if rnd.random() < ambiguity:
+            text += f'HID: {rnd.choice(["V01", "V02", "1.0"])} , '
+        vid = rnd.choice(['V01', 'V02', 'V03', '1.0', ''])
+        text += 'VID: '
+        if vid:
+            spans.append({'start': len(text), 'end': len(text) + len(vid) - 1})
+        text += f'{vid} , SN: ' + ''.join(rnd.choice('ABCDEFGHJKLMNPQRSTUVWXYZ0123456789') for _ in range(11)) + ' '
+    banner = 'show inventory '
+    while len(banner) + len(text) < length:
+        banner += '+' * 40 + ' INFO: Please use "show license UDI" to get serial number for licensing. '
+    spans = [{'start': span['start'] + len(banner), 'end': span['end'] + len(banner)} for span in spans]
+    return {KEYS[0]: banner + text + 'router-r01#', KEYS[1]: spans}
+
+def interface_document(rnd, length, selections, ambiguity):
+    r"""
+    Creates synthetic ``show interface description`` output with ``selections`` selected interface names
+
+    Arguments:
+
+    rnd (random.Random): source of randomness
+    length (int): approximate length of document, it is padded with log lines preceding the table
+    selections (int): number of selected interfaces
+    ambiguity (float): probability that description of interface contains interface-like word which is not selected
+
+    Returns:
+
+    (dict): dictionary with ``inputData`` and ``selectedSubStrings`` (inclusive end)
+    """
+    text = 'show interface description\n'
+    while len(text) < length - 60 * (selections + 1):
+        text += f'% Interface Lo{rnd.randint(0, 99)} is administratively down, last change {rnd.randint(1, 59)} minutes ago\n'
+    text += 'Interface                      Status         Protocol Description\n'
+    spans = []
+    for item in range(selections):
+        name = f'{rnd.choice(["Fa", "Gi", "Te"])}{rnd.randint(0, 4)}/{rnd.randint(0, 48)}'
+        spans.append({'start': len(text), 'end': len(text) + len(name) - 1})
+        state = rnd.choice(['up', 'down'])
+        description = f'uplink to Gi{rnd.randint(0, 9)}/{rnd.randint(0, 9)}' if rnd.random() < ambiguity else rnd.choice(['WAN', 'LAN', ''])
+        text += f'{name:<31}{state:<15}{state:<9}{description}\n'
+    return {KEYS[0]: text + 'router-r01#\n', KEYS[1]: spans}
+
+def generate_corpus(documents = 100, length = 1000, selections = 5, ambiguity = 0.0, kind = 'inventory', seed = 0):
+    r"""
+    Creates reproducible synthetic corpus of network device outputs in format accepted by ``RegexGenerator.parse_data`` with ``alternative_keys=KEYS``
+
+    Arguments:
+
+    documents (int, optional): number of documents. (default: 100)
+    length (int, optional): approximate length of every document. (default: 1000)
+    selections (int, optional): number of selections per document. (default: 5)
+    ambiguity (float, optional): probability of decoy fields resembling selected ones. (default: 0.0)
+    kind (str, optional): ``'inventory'`` or ``'interface'``. (default: ``'inventory'``)
+    seed (int, optional): seed of random generator. (default: 0)
+
+    Returns:
+
+    (list): list of dictionaries
+    """
+    make_document = {'inventory': inventory_document, 'interface': interface_document}[kind]
+    rnd = random.Random(seed)
+    return [make_document(rnd, length, selections, ambiguity) for _ in range(documents)]
+
+def measure(setup, function, repeat = 3):
+    r"""
+    Measures best wall time of ``function(setup())`` over ``repeat`` runs and its peak traced memory in separate run
+
+    Returns:
+
+    (dict): dictionary with ``seconds`` and ``peak_bytes``
+    """
+    best = None
+    for _ in range(repeat):
+        state = setup()
+        start = time.perf_counter()
+        with redirect_stdout(io.StringIO()):
+            function(state)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    state = setup()
+    tracemalloc.start()
+    try:
+        with redirect_stdout(io.StringIO()):
+            function(state)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {'seconds': best, 'peak_bytes': peak}
+
+def run_benchmark(corpus, columns = 50, evolve_kwargs = None, repeat = 3):
+    r"""
+    Times ``parse_data``, ``generate_next_part``, ``evaluate`` and end to end ``evolve`` on ``corpus``
+
+    Arguments:
+
+    corpus (list): list of dictionaries, see ``generate_corpus``
+    columns (int, optional): number of columns generated in ``generate_next_part`` and ``evaluate`` phases. (default: 50)
+    evolve_kwargs (dict, optional): keyword arguments of ``RegexGenerator.evolve``. (default: ``None``)
+    repeat (int, optional): number of timed runs of every phase. (default: 3)
+
+    Returns:
+
+    (dict): dictionary mapping phase to its measurements
+    """
+    evolve_kwargs = evolve_kwargs or {}
+
+    def parsed():
+        generator = RegexGenerator()
+        generator.parse_data(corpus, alternative_keys=KEYS)
+        return generator
+
+    def generate(generator):
+        for _ in range(columns):
+            left_block, mid_block, right_block = generator.generate_next_part()
+            if left_block:
+                generator.left_regex_builder.append(left_block)
+            if right_block:
+                generator.right_regex_builder.append(right_block)
+        return generator
+
+    def built():
+        generator = generate(parsed())
+        generator.mid_regex = evolve_kwargs.get('mid') or '.*?'
+        return generator
+
+    results = {
+        'parse_data': measure(lambda: None, lambda state: parsed(), repeat),
+        'generate_next_part': measure(parsed, generate, repeat),
+        'evaluate': measure(built, lambda generator: generator.evaluate(), repeat),
+    }
+    outcome = {}
+    def evolve(generator):
+        outcome['regex'] = generator.evolve(**evolve_kwargs)
+    results['evolve'] = measure(parsed, evolve, repeat)
+    results['evolve']['regex'] = outcome['regex'] if isinstance(outcome['regex'], str) or outcome['regex'] is None else repr(outcome['regex'])
+    return results
+
+def run_fusion_benchmark(documents, fields = None, repeat = 3):
+    r"""
+    Times extraction of several fields from ``documents`` by separate ``finditer`` runs and by ``MultiExtractor`` with literal prefilter
+
+    Arguments:
+
+    documents (list): list of strings
+    fields (dict, optional): maps field names to regexes, ``FIELD_PATTERNS`` if not set. (default: ``None``)
+    repeat (int, optional): number of timed runs. (default: 3)
+
+    Returns:
+
+    (dict): dictionary with measurements of ``separate`` and ``prefiltered`` scans and ``equal`` flag telling whether their results are the same
+    """
+    extractor = MultiExtractor(fields or FIELD_PATTERNS)
+    results = {
+        'separate': measure(lambda: None, lambda state: [extractor.scan_separately(document) for document in documents], repeat),
+        'prefiltered': measure(lambda: None, lambda state: [extractor.scan(document) for document in documents], repeat),
+    }
+    results['equal'] = all(extractor.scan(document) == extractor.scan_separately(document) for document in documents)
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark of RegexGenerator on synthetic network device outputs')
+    parser.add_argument('--documents', type=int, nargs='+', default=[10, 100])
+    parser.add_argument('--length', type=int, nargs='+', default=[1000])
+    parser.add_argument('--selections', type=int, nargs='+', default=[5])
+    parser.add_argument('--ambiguity', type=float, nargs='+', default=[0.0])
+    parser.add_argument('--kind', nargs='+', default=['inventory', 'interface'])
+    parser.add_argument('--columns', type=int, default=50)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--evolve-kwargs', type=json.loads, default={'ignore_mid': True, 'mid': '[\\w./]+', 'check_mid': False, 'search': 'galloping'})
+    parser.add_argument('--fusion', action='store_true', help='benchmark multi-field extraction against separate scans instead of training')
+    parser.add_argument('--output', default='bench_output.json')
+    args = parser.parse_args()
+
+    if args.fusion:
+        runs = []
+        for documents in args.documents:
+            for length in args.length:
+                for selections in args.selections:
+                    for ambiguity in args.ambiguity:
+                        params = {'kinds': args.kind, 'documents': documents, 'length': length, 'selections': selections, 'ambiguity': ambiguity, 'seed': args.seed}
+                        corpus = [document[KEYS[0]] for kind in args.kind
+                                  for document in generate_corpus(documents, length, selections, ambiguity, kind, args.seed)]
+                        results = run_fusion_benchmark(corpus, repeat=args.repeat)
+                        runs.append({'params': params, 'results': results})
+                        print(json.dumps(params), f"separate={results['separate']['seconds']:.4f}s prefiltered={results['prefiltered']['seconds']:.4f}s equal={results['equal']}")
+        with open(args.output, 'w') as f:
+            json.dump({'python': platform.python_version(), 'platform': platform.platform(), 'fields': FIELD_PATTERNS, 'runs': runs}, f, indent=2)
+        return
+
+    runs = []
+    for kind in args.kind:
+        for documents in args.documents:
+            for length in args.length:
+                for selections in args.selections:
+                    for ambiguity in args.ambiguity:
+                        params = {'kind': kind, 'documents': documents, 'length': length, 'selections': selections, 'ambiguity': ambiguity, 'seed': args.seed}
+                        corpus = generate_corpus(**params)
+                        results = run_benchmark(corpus, args.columns, args.evolve_kwargs, args.repeat)
+                        runs.append({'params': params, 'results': results})
+                        print(json.dumps(params), ' '.join(f"{phase}={result['seconds']:.4f}s" for phase, result in results.items()))
+
+    report = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'columns': args.columns,
+        'evolve_kwargs': args.evolve_kwargs,
+        'runs': runs,
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+
+if __name__ == '__main__':
+    main()
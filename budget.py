@@ -0,0 +1,60 @@
+import time
+
+class BudgetExceeded(Exception):
+    r"""Raised inside ``RegexGenerator.evolve`` when ``TrainingBudget`` runs out, message says which limit was hit"""
+
+class TrainingBudget:
+    r"""
+    Limits of ``RegexGenerator.evolve`` run: wall time, number of evaluations and cooperative cancellation from another thread.
+    Limits are checked before every evaluation and column generation, time and cancellation also before every string scanned by ``RegexGenerator.check_string``.
+    Every evaluated candidate is recorded, so the best one can be returned when budget runs out.
+    """
+
+    def __init__(self, time_limit = None, max_evaluations = None, cancel = None):
+        r"""
+        TrainingBudget initializer. Time is counted from initialization.
+
+        Arguments:
+
+        time_limit (float, optional): number of seconds training may take. (default: ``None``)
+        max_evaluations (int, optional): maximal number of evaluations. (default: ``None``)
+        cancel (threading.Event, optional): training stops once this event is set, any object with ``is_set`` method can be used. (default: ``None``)
+        """
+        self.time_limit = time_limit
+        self.max_evaluations = max_evaluations
+        self.cancel = cancel
+        self.start = time.monotonic()
+        self.evaluations = 0
+        self.candidates = [] # tuples (mid_regex, len_left, len_right, passed) of evaluated regexes
+
+    def elapsed(self):
+        r"""Returns number of seconds since initialization"""
+        return time.monotonic() - self.start
+
+    def check(self, evaluation = False):
+        r"""Raises ``BudgetExceeded`` if any limit is reached, number of evaluations is checked only if new ``evaluation`` is about to start"""
+        if self.cancel is not None and self.cancel.is_set():
+            raise BudgetExceeded('cancelled')
+        if self.time_limit is not None and self.elapsed() >= self.time_limit:
+            raise BudgetExceeded('time_limit')
+        if evaluation and self.max_evaluations is not None and self.evaluations >= self.max_evaluations:
+            raise BudgetExceeded('max_evaluations')
+
+    def limited_columns(self, generate_next_part):
+        r"""Wraps ``generate_next_part`` function so that budget is checked before every call"""
+        def wrapper(*args, **kwargs):
+            self.check()
+            return generate_next_part(*args, **kwargs)
+        return wrapper
+
+    def limited_evaluation(self, evaluate, generator):
+        r"""Wraps ``evaluate`` function of ``generator`` so that budget is checked before every call and evaluated candidate is recorded"""
+        def wrapper(ignore_mid = True, len_left = None, len_right = None):
+            self.check(evaluation=True)
+            self.evaluations += 1
+            passed = evaluate(ignore_mid=ignore_mid, len_left=len_left, len_right=len_right)
+            len_left = len(generator.left_regex_builder) if len_left is None else len_left
+            len_right = len(generator.right_regex_builder) if len_right is None else len_right
+            self.candidates.append((generator.mid_regex, len_left, len_right, passed))
+            return passed
+        return wrapper
@@ -0,0 +1,140 @@
+from array import array
+import hashlib
+import struct
+import json
+import mmap
+import os
+
+MAGIC = b'REGOSCC1'
+HEADER = struct.Struct('<8sQ') # magic and length of JSON header following it
+WIDTHS = {1: 'latin-1', 2: 'utf-16-le', 4: 'utf-32-le'} # encodings storing every code point in given number of bytes
+
+def encode_code_points(text):
+    r"""Returns tuple (width, data) with code points of ``text`` stored in the narrowest of ``WIDTHS``, like ``str`` does internally"""
+    if text.isascii():
+        return 1, text.encode('ascii')
+    for width in (1, 2):
+        try:
+            data = text.encode(WIDTHS[width], 'surrogatepass')
+        except UnicodeEncodeError:
+            continue
+        if len(data) == width * len(text): # characters outside BMP are encoded as surrogate pairs in UTF-16
+            return width, data
+    return 4, text.encode(WIDTHS[4], 'surrogatepass')
+
+class CorpusCache:
+    r"""
+    Content-addressed directory of parsed corpora used by ``RegexGenerator.parse_data``. Corpus is stored under hash of its records
+    and parse options, so changed records or options never reuse stale entries. Every file holds array of code points of all source strings,
+    each one stored in the narrowest of 1, 2 or 4 bytes wide units (bytes with ``as_bytes``), arrays of offsets and widths of strings
+    and array of (string index, start, end, max_nbh) rows of entries. Files are memory-mapped when loaded.
+    """
+
+    def __init__(self, directory):
+        r"""
+        CorpusCache initializer, ``directory`` is created if it does not exist
+
+        Arguments:
+
+        directory (str): path of cache directory
+        """
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def key(self, data, options):
+        r"""
+        Returns hex digest identifying corpus. Paths are hashed by content of file, iterables by text of their JSON records.
+        Records which are already parsed are not accepted, hashing them costs about as much as parsing them, so cache would never pay off.
+
+        Arguments:
+
+        data (str or iterable): path to JSONL file or iterable of JSON strings
+        options (dict): parse options, JSON serializable
+        """
+        digest = hashlib.sha256(json.dumps(options, sort_keys=True).encode('utf-8'))
+        if isinstance(data, (str, os.PathLike)):
+            with open(data, 'rb') as f:
+                for block in iter(lambda: f.read(1 << 20), b''):
+                    digest.update(block)
+            return digest.hexdigest()
+        for record in data:
+            if not isinstance(record, (str, bytes)):
+                raise Exception('Corpus cache accepts only path to JSONL file or JSON strings, parsed records are not cached')
+            record = record.encode('utf-8', 'surrogatepass') if isinstance(record, str) else record
+            digest.update(struct.pack('<Q', len(record)))
+            digest.update(record)
+        return digest.hexdigest()
+
+    def path(self, key):
+        r"""Returns path of file storing corpus with ``key``"""
+        return os.path.join(self.directory, key + '.corpus')
+
+    def store(self, key, strings, rows):
+        r"""
+        Writes corpus atomically, concurrent writers of the same key produce identical files
+
+        Arguments:
+
+        key (str): key returned by ``key``
+        strings (list): distinct source strings, all ``str`` or all ``bytes``
+        rows (list): tuples (string index, start, end, max_nbh) of entries, ``max_nbh`` may be ``None``
+        """
+        as_bytes = bool(strings) and not isinstance(strings[0], str)
+        encoded = [(1, string) for string in strings] if as_bytes else [encode_code_points(string) for string in strings]
+        offsets, widths = array('q', [0]), array('B', [width for width, data in encoded])
+        for width, data in encoded:
+            offsets.append(offsets[-1] + len(data))
+        entries = array('q', [value if value is not None else -1 for row in rows for value in row])
+
+        arrays = (('text', b''.join(data for width, data in encoded)), ('offsets', offsets.tobytes()), ('widths', widths.tobytes()), ('entries', entries.tobytes()))
+        sections, position = {}, 0
+        for name, data in arrays:
+            sections[name] = [position, len(data)]
+            position += len(data) + (-len(data) % 8) # sections are aligned for ``memoryview.cast``
+        header = json.dumps({'as_bytes': as_bytes, 'strings': len(strings), 'entries': len(rows), 'sections': sections}).encode('utf-8')
+        header += b' ' * (-(HEADER.size + len(header)) % 8)
+
+        temporary = f'{self.path(key)}.{os.getpid()}.tmp'
+        with open(temporary, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, len(header)))
+            f.write(header)
+            for name, data in arrays:
+                f.write(data)
+                f.write(b'\0' * (-len(data) % 8))
+        os.replace(temporary, self.path(key))
+
+    def load(self, key):
+        r"""
+        Reads corpus stored under ``key``
+
+        Returns:
+
+        (tuple): (strings, rows) as passed to ``store`` or None if corpus is not cached
+        """
+        try:
+            f = open(self.path(key), 'rb')
+        except FileNotFoundError:
+            return None
+        with f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            magic, length = HEADER.unpack_from(buffer)
+            if magic != MAGIC:
+                raise Exception(f"Not a corpus cache file: {self.path(key)}")
+            header = json.loads(bytes(buffer[HEADER.size:HEADER.size + length]))
+            base = HEADER.size + length
+
+            def section(name):
+                start, size = header['sections'][name]
+                return memoryview(buffer)[base + start:base + start + size]
+
+            with section('text') as text, section('offsets') as offsets, section('widths') as widths, section('entries') as entries:
+                with offsets.cast('q') as view:
+                    offsets = view.tolist()
+                with entries.cast('q') as view:
+                    values = view.tolist()
+                if header['as_bytes']:
+                    strings = [bytes(text[offsets[index]:offsets[index + 1]]) for index in range(header['strings'])]
+                else:
+                    strings = [str(text[offsets[index]:offsets[index + 1]], WIDTHS[width], 'surrogatepass') for index, width in enumerate(widths)]
+
+        rows = list(zip(values[0::4], values[1::4], values[2::4], [value if value >= 0 else None for value in values[3::4]]))
+        return strings, rows
@@ -0,0 +1,83 @@
+import time
+import re
+
+def scan_time(regex, texts, repeat = 3):
+    r"""
+    Returns best wall time of scanning all ``texts`` with ``regex.finditer`` over ``repeat`` runs
+
+    Arguments:
+
+    regex (re.Pattern): compiled regex
+    texts (list): list of strings
+    repeat (int, optional): number of runs. (default: 3)
+    """
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for text in texts:
+            for _ in regex.finditer(text):
+                pass
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def cost_per_kb(regex, texts, repeat = 3):
+    r"""
+    Measures time in seconds needed by ``regex`` to scan 1 KB of ``texts``
+
+    Arguments:
+
+    regex (re.Pattern): compiled regex
+    texts (list): list of strings, both matching and not matching ones
+    repeat (int, optional): number of runs. (default: 3)
+    """
+    size = sum(len(text) for text in texts)
+    if not size:
+        return 0.0
+    return scan_time(regex, texts, repeat) / (size / 1024)
+
+def is_pathological(regex, texts, base_size = 4096, factor = 4, growth_limit = 8.0, repeat = 3):
+    r"""
+    Detects backtracking growth of ``regex`` on non-matching input. ``texts`` are concatenated into sample of ``base_size`` characters
+    and sample ``factor`` times longer. Regex is pathological if time grows more than ``growth_limit`` times, linear growth being ``factor``.
+
+    Arguments:
+
+    regex (re.Pattern): compiled regex
+    texts (list): list of non-matching strings
+    base_size (int, optional): length of smaller sample. (default: 4096)
+    factor (int, optional): how many times longer the bigger sample is. (default: 4)
+    growth_limit (float, optional): maximal accepted ratio of scanning times. (default: 8.0)
+    repeat (int, optional): number of runs. (default: 3)
+
+    Returns:
+
+    (bool): True if growth is superlinear
+    """
+    joined = (' ' if isinstance(texts[0], str) else b' ').join(texts) if texts else ''
+    if not joined:
+        return False
+    sample = (joined * (base_size // len(joined) + 1))[:base_size]
+    small = scan_time(regex, [sample], repeat)
+    big = scan_time(regex, [sample * factor], repeat)
+    return big > growth_limit * max(small, 1e-6)
+
+def is_literal(char):
+    r"""Checks whether regex block ``char`` captures exactly one literal character"""
+    return (len(char) == 1 and char not in '.^$') or (len(char) == 2 and char[0] == '\\' and not char[1].isalnum())
+
+def score_pattern(pattern, positive_texts, negative_texts, repeat = 3):
+    r"""
+    Scores ``pattern`` by its cost on positive and negative texts and backtracking growth on negative ones. Pattern is encoded if texts are ``bytes``.
+
+    Returns:
+
+    (dict): dictionary with ``regex``, ``cost_per_kb`` and ``pathological``
+    """
+    texts = list(positive_texts) + list(negative_texts)
+    regex = re.compile(pattern.encode('utf-8') if texts and not isinstance(texts[0], str) else pattern)
+    return {
+        'regex': pattern,
+        'cost_per_kb': cost_per_kb(regex, texts, repeat),
+        'pathological': is_pathological(regex, negative_texts, repeat=repeat),
+    }
@@ -0,0 +1,301 @@
+import mmap
+import re
+try:
+    import re._parser as sre_parse
+except ImportError: # Python < 3.11
+    import sre_parse
+
+def scan_window(regex, buffer, position, boundary, endpos, final):
+    r"""
+    Finds matches of ``regex`` in window of ``buffer`` between ``position`` and ``endpos``. Unless window is ``final``, matches starting at or after ``boundary``
+    and matches touching ``endpos`` (possibly cut by end of window) are left for the next window.
+
+    Returns:
+
+    (tuple): (matches, next_position) - list of ``re.Match`` objects and position at which next window should start
+    """
+    matches = []
+    for match in regex.finditer(buffer, position, endpos):
+        if not final and (match.start() >= boundary or (match.end() >= endpos and match.start() > position)):
+            return matches, match.start()
+        matches.append(match)
+        position = max(position, match.end())
+    return matches, max(position, boundary)
+
+def literal_anchor(pattern, flags = 0):
+    r"""
+    Finds the longest run of literal characters every match of ``pattern`` has to contain and bounds of its distance from start of match.
+    Only top level sequence and groups are inspected, empty string is returned for case insensitive patterns.
+
+    Returns:
+
+    (tuple): (literal, min_offset, max_offset), ``max_offset`` is None if items preceding literal have unbounded width
+    """
+    parsed = sre_parse.parse(pattern, flags)
+    if (flags | parsed.state.flags) & re.IGNORECASE:
+        return '', 0, None
+    def tokens(items):
+        for op, av in items:
+            if op is sre_parse.LITERAL:
+                yield chr(av), 1, 1
+            elif op is sre_parse.SUBPATTERN and not av[1] & re.IGNORECASE:
+                yield from tokens(av[-1])
+            else:
+                yield (None, *sre_parse.SubPattern(parsed.state, [(op, av)]).getwidth())
+    best, run, offset = ('', 0, None), '', (0, 0)
+    for token, low, high in tokens(parsed):
+        if token is None:
+            run = ''
+        else:
+            if not run:
+                start = offset
+            run += token
+            if len(run) > len(best[0]):
+                best = (run, start[0], start[1] if start[1] < sre_parse.MAXREPEAT - 1 else None)
+        offset = (offset[0] + low, offset[1] + high)
+    return best
+
+class Extractor:
+    r"""
+    Precompiled regex created by ``RegexGenerator.evolve`` extracting values of its 1st group from strings, documents, streams and files.
+    Long inputs are scanned in windows of ``chunk_size`` characters (or bytes), consecutive windows overlap by ``overlap`` so that matches crossing
+    window boundary are found as if whole input was scanned at once. ``overlap`` has to be longer than the longest match.
+    """
+
+    def __init__(self, pattern, flags = 0, overlap = 4096, chunk_size = 1 << 24):
+        r"""
+        Extractor initializer
+
+        Arguments:
+
+        pattern (str): regex with part of interest in 1st group
+        flags (int, optional): flags of ``re`` module. (default: 0)
+        overlap (int, optional): number of characters (bytes for files) shared by consecutive windows. (default: 4096)
+        chunk_size (int, optional): number of characters (bytes for files) scanned in one window. (default: 16 MB)
+        """
+        self.pattern = pattern
+        self.flags = flags
+        self.overlap = overlap
+        self.chunk_size = chunk_size
+        self.regex = re.compile(pattern, flags)
+        self.bytes_regex = None # compiled on first use with ``bytes`` input
+
+    def __repr__(self):
+        return f'Extractor({self.pattern!r}, overlap={self.overlap})'
+
+    @classmethod
+    def from_generator(cls, generator, pattern, **kwargs):
+        r"""
+        Creates Extractor for ``pattern`` trained by ``generator``. Overlap is derived from the longest match in source strings,
+        doubled for longer parts of interest and multiplied by 4 bytes, the longest UTF-8 encoding of a character.
+        """
+        extractor = cls(pattern, **kwargs)
+        longest = max((len(match.group(0)) for string in generator.spans_index for match in extractor.compiled(string).finditer(string)), default=0)
+        if 'overlap' not in kwargs:
+            extractor.overlap = max(256, 8 * longest)
+        return extractor
+
+    def compiled(self, buffer):
+        r"""Returns regex matching type of ``buffer``, ``bytes`` pattern for bytes-like objects"""
+        if isinstance(buffer, str):
+            return self.regex
+        if self.bytes_regex is None:
+            self.bytes_regex = re.compile(self.pattern.encode('utf-8'), self.flags)
+        return self.bytes_regex
+
+    def finditer(self, text):
+        r"""
+        Lazily yields tuples (value, span) of 1st group for every match in ``text``
+
+        Arguments:
+
+        text (str or bytes): text to scan, bytes-like objects are matched with bytes pattern
+        """
+        for match in self.compiled(text).finditer(text):
+            yield match.group(1), match.span(1)
+
+    def values(self, text):
+        r"""Returns list of values of 1st group found in ``text``"""
+        return [value for value, span in self.finditer(text)]
+
+    def spans(self, text):
+        r"""Returns list of spans of 1st group found in ``text``"""
+        return [span for value, span in self.finditer(text)]
+
+    def extract(self, documents):
+        r"""
+        Lazily yields tuples (index, value, span) for iterable of ``documents``, ``index`` is position of document in iterable
+
+        Arguments:
+
+        documents (iterable): strings or bytes
+        """
+        for index, document in enumerate(documents):
+            for value, span in self.finditer(document):
+                yield index, value, span
+
+    def iter_stream(self, chunks):
+        r"""
+        Lazily yields tuples (value, span) for text arriving in ``chunks``, e.g. lines or blocks read from file or socket.
+        Spans are offsets in concatenation of all chunks. Chunks are buffered until at least ``chunk_size`` characters are waiting,
+        so small chunks do not cause rescanning, and only unscanned tail of text (at most ``overlap`` beyond last window) is kept in memory.
+
+        Arguments:
+
+        chunks (iterable): strings or bytes, all of the same type
+        """
+        buffer, offset, position = None, 0, 0
+        pending, pending_size = [], 0 # chunks received since last scan
+        for chunk in chunks:
+            pending.append(chunk)
+            pending_size += len(chunk)
+            if pending_size < self.chunk_size:
+                continue
+            if buffer is not None:
+                pending.insert(0, buffer[position:])
+                offset += position
+            buffer, position = chunk[:0].join(pending), 0
+            pending, pending_size = [], 0
+            if len(buffer) - self.overlap <= position:
+                continue
+            matches, position = scan_window(self.compiled(buffer), buffer, position, len(buffer) - self.overlap, len(buffer), False)
+            for match in matches:
+                start, end = match.span(1)
+                yield match.group(1), (offset + start, offset + end)
+
+        if pending:
+            if buffer is not None:
+                pending.insert(0, buffer[position:])
+                offset += position
+            buffer, position = pending[0][:0].join(pending), 0
+        if buffer is not None:
+            matches, position = scan_window(self.compiled(buffer), buffer, position, len(buffer), len(buffer), True)
+            for match in matches:
+                start, end = match.span(1)
+                yield match.group(1), (offset + start, offset + end)
+
+    def iter_file(self, path, encoding = 'utf-8'):
+        r"""
+        Lazily yields tuples (value, span) for file at ``path`` mapped into memory. File is scanned with bytes pattern in windows,
+        so it is never loaded as a whole. Spans are byte offsets.
+
+        Arguments:
+
+        path (str): path of file
+        encoding (str, optional): encoding used to decode values, raw bytes are yielded if set to ``None``. (default: ``'utf-8'``)
+        """
+        with open(path, 'rb') as f:
+            if not f.seek(0, 2):
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                regex = self.compiled(b'')
+                size, position = len(buffer), 0
+                while True:
+                    boundary = position + self.chunk_size
+                    endpos = min(size, boundary + self.overlap)
+                    final = endpos == size
+                    matches, position = scan_window(regex, buffer, position, boundary, endpos, final)
+                    for match in matches:
+                        value = match.group(1)
+                        yield (value if encoding is None else value.decode(encoding, 'replace')), match.span(1)
+                    if final:
+                        break
+
+class MultiExtractor:
+    r"""
+    Several regexes, each extracting values of its 1st group, applied together to documents. Required literal of every field is the prefilter:
+    fields whose literal is missing in document are skipped, and when literal is preceded by items of bounded width and is rare enough,
+    it picks scan positions - literal occurrences are found by ``str.find`` and field's regex is matched only at positions from which
+    they can be reached. Fields starting with their literal are left to ``re``, which searches for literal prefix itself. Results are the same
+    as those of separate ``finditer`` runs, compare throughput with ``benchmark.py --fusion``.
+    """
+
+    def __init__(self, fields, flags = 0, anchor_ratio = 8):
+        r"""
+        MultiExtractor initializer
+
+        Arguments:
+
+        fields (dict or list): maps field names to regex strings or ``Extractor`` objects returned by ``RegexGenerator.evolve``, list items are named by their indexes
+        flags (int, optional): flags of ``re`` module, shared by all fields. (default: 0)
+        anchor_ratio (int, optional): positions are picked by literal only if document is more than ``anchor_ratio`` times longer than number of positions to try. (default: 8)
+        """
+        if not isinstance(fields, dict):
+            fields = dict(enumerate(fields))
+        self.flags = flags
+        self.anchor_ratio = anchor_ratio
+        self.names = list(fields)
+        self.extractors = [field if isinstance(field, Extractor) else Extractor(field, flags) for field in fields.values()]
+        for extractor in self.extractors:
+            if not extractor.regex.groups:
+                raise Exception(f"Pattern has no group: {extractor.pattern}")
+        self.anchors = {} # maps (field index, type of text) to (literal, min_offset, max_offset) of field's pattern
+
+    def __repr__(self):
+        return f'MultiExtractor({self.names!r})'
+
+    def anchor(self, index, text):
+        r"""Returns required literal of field at ``index`` and bounds of its offset in match, literal is ``bytes`` for bytes-like ``text``"""
+        key = (index, isinstance(text, str))
+        if key not in self.anchors:
+            extractor = self.extractors[index]
+            if key[1]:
+                self.anchors[key] = literal_anchor(extractor.pattern, extractor.flags)
+            else:
+                literal, low, high = literal_anchor(extractor.pattern.encode('utf-8'), extractor.flags)
+                self.anchors[key] = literal.encode('latin-1'), low, high
+        return self.anchors[key]
+
+    def scan_anchored(self, regex, text, literal, low, high):
+        r"""Matches ``regex`` at positions of ``text`` between ``high`` and ``low`` characters before occurrences of ``literal``, the same as ``finditer``"""
+        results, position = [], 0 # every position before ``position`` is tried or covered by match
+        occurrence = text.find(literal, low)
+        while occurrence >= 0:
+            position = max(position, occurrence - high)
+            while position <= occurrence - low:
+                match = regex.match(text, position)
+                if match:
+                    results.append((match.group(1), match.span(1)))
+                    position = match.end() # match contains literal, so it is never empty
+                else:
+                    position += 1
+            occurrence = text.find(literal, max(occurrence + 1, position + low))
+        return results
+
+    def scan(self, text):
+        r"""
+        Scans ``text`` for all fields
+
+        Arguments:
+
+        text (str or bytes): text to scan, bytes-like objects are matched with bytes patterns
+
+        Returns:
+
+        (dict): maps field names to lists of tuples (value, span) of 1st group, the same as ``Extractor.finditer`` of every field
+        """
+        results = {}
+        for index, (name, extractor) in enumerate(zip(self.names, self.extractors)):
+            literal, low, high = self.anchor(index, text)
+            if literal not in text:
+                results[name] = []
+            elif high and text.count(literal) * (high - low + 1) * self.anchor_ratio < len(text):
+                results[name] = self.scan_anchored(extractor.compiled(text), text, literal, low, high)
+            else:
+                results[name] = list(extractor.finditer(text))
+        return results
+
+    def scan_separately(self, text):
+        r"""Scans ``text`` with every field separately, reference result of ``scan``"""
+        return {name: list(extractor.finditer(text)) for name, extractor in zip(self.names, self.extractors)}
+
+    def extract(self, documents):
+        r"""
+        Lazily yields tuples (index, results) for iterable of ``documents``, ``index`` is position of document in iterable and ``results`` are returned by ``scan``
+
+        Arguments:
+
+        documents (iterable): strings or bytes
+        """
+        for index, document in enumerate(documents):
+            yield index, self.scan(document)
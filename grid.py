@@ -0,0 +1,128 @@
+import numpy as np
+
+PAD = -1 # code point used for positions past the end of neighbourhood
+
+class CharacterGrid:
+    r"""
+    Column engine reading neighbourhoods of all ``Data_Entry`` objects as padded matrices of code points (entries x position).
+    It is an alternative to stepping through ``Data_Entry`` cursors one character at a time in ``RegexGenerator.generate_next_part``.
+    Matrices are loaded in tiles of ``tile_width`` columns when generation reaches them, so memory does not grow with length of neighbourhoods.
+    """
+
+    def __init__(self, generator, tile_width = 64):
+        r"""
+        CharacterGrid initializer. Cursor positions of ``data_entries`` are copied, cursors are not moved.
+
+        Arguments:
+
+        generator (RegexGenerator): generator providing ``data_entries``, ``train_part_end_index`` and ``find_correct_block_char``
+        tile_width (int, optional): number of columns loaded at once. (default: 64)
+        """
+        self.generator = generator
+        self.tile_width = tile_width
+        entries = generator.data_entries
+
+        # (string, position, step, stop) of every entry, the same as its cursor
+        self.cursors = {
+            'left': [(entry.string, entry.left_pos, entry.left_step, entry.left_stop) for entry in entries],
+            'mid': [(entry.string, entry.mid_pos, 1, entry.mid_stop) for entry in entries],
+            'right': [(entry.string, entry.right_pos, 1, entry.right_stop) for entry in entries],
+        }
+        self.tiles = {side: (None, None) for side in self.cursors} # (index of first column, matrix) of loaded tile of every side
+        self.left_index = 0
+        self.mid_index = 0
+        self.right_index = 0
+
+    @staticmethod
+    def window(string, position, step, stop, start, end):
+        r"""Returns characters ``start`` to ``end`` (exclusive) steps away from cursor at ``position``, in order of iteration"""
+        if step == 1:
+            return string[position + start:min(stop, position + end)]
+        low, high = max(stop + 1, position - end + 1), position - start + 1
+        return string[low:high][::-1] if high > low else string[:0]
+
+    def tile(self, side, index):
+        r"""Returns (index of first column, matrix) of tile of ``side`` containing column ``index``, loading it if needed"""
+        first, matrix = self.tiles[side]
+        if first is None or not first <= index < first + self.tile_width:
+            first = index - index % self.tile_width
+            matrix = self.load([self.window(*cursor, first, first + self.tile_width) for cursor in self.cursors[side]])
+            self.tiles[side] = first, matrix
+        return first, matrix
+
+    @staticmethod
+    def load(strings):
+        r"""
+        Creates matrix of code points with one row per string, padded with ``PAD``
+
+        Arguments:
+
+        strings (list): list of strings or ``bytes``
+
+        Returns:
+
+        (numpy.ndarray): matrix of shape (len(strings), longest string length)
+        """
+        width = max((len(s) for s in strings), default=0)
+        matrix = np.full((len(strings), width), PAD, dtype=np.int32)
+        for row, s in enumerate(strings):
+            if isinstance(s, (bytes, bytearray)):
+                matrix[row, :len(s)] = np.frombuffer(s, dtype=np.uint8)
+            elif s:
+                matrix[row, :len(s)] = np.frombuffer(s.encode('utf-32-le'), dtype='<u4')
+        return matrix
+
+    def column_block(self, side, index):
+        r"""
+        Generates ``RegexPart`` for ``index`` column of ``side`` (``'left'``, ``'mid'`` or ``'right'``).
+
+        Returns:
+
+        (RegexPart): RegexPart object representing fragment matching whole column. None if every row is exhausted.
+        """
+        first, matrix = self.tile(side, index)
+        if index - first >= matrix.shape[1]:
+            return None
+
+        column = matrix[:, index - first]
+        present = column != PAD
+        if not present.any():
+            return None
+
+        optional = not present.all()
+        train_end = self.generator.train_part_end_index
+        train = column[:train_end] if train_end else column
+        if self.generator.as_bytes:
+            codes_train = {code if code != PAD else '' for code in np.unique(train).tolist()}
+            codes = set(np.unique(column[present]).tolist())
+            return self.generator.find_correct_block_code(codes_train, codes, optional, len(column))
+        options_set_train = {chr(code) if code != PAD else '' for code in np.unique(train).tolist()}
+        options_set = {chr(code) for code in np.unique(column[present]).tolist()}
+
+        return self.generator.find_correct_block_char(options_set_train, options_set, optional, len(column))
+
+    def generate_next_part(self, left = True, mid = False, right = True):
+        r"""
+        Generates next RegexParts for specified parts of regex. Works the same way as ``RegexGenerator.generate_next_part``.
+
+        Arguments:
+
+        left (bool, optional): if set to ``True``, next column of left neighbourhoods will be used.
+        mid (bool, optional): if set to ``True``, next column of parts of interest will be used.
+        right (bool, optional): if set to ``True``, next column of right neighbourhoods will be used.
+
+        Returns
+
+        (tuple): (left_block, mid_block, right_block) - ``RegexPart`` objects.
+        """
+        left_block, mid_block, right_block = None, None, None
+        if left:
+            left_block = self.column_block('left', self.left_index)
+            self.left_index += 1
+        if mid:
+            mid_block = self.column_block('mid', self.mid_index)
+            self.mid_index += 1
+        if right:
+            right_block = self.column_block('right', self.right_index)
+            self.right_index += 1
+        return left_block, mid_block, right_block
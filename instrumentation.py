@@ -0,0 +1,75 @@
+import time
+
+class TrainingStats:
+    r"""
+    Collects statistics of ``RegexGenerator`` training: wall time of phases, counters of work done and outcomes of evaluations.
+    Generator records them only if stats object is attached, see ``RegexGenerator.enable_stats``.
+
+    Phases are ``mid`` (building mid regex), ``columns`` (generating neighbourhood columns), ``compile`` (building and compiling regex)
+    and ``evaluate`` (whole evaluation, compilation of evaluated regex included).
+    """
+
+    def __init__(self, callbacks = None):
+        r"""
+        TrainingStats initializer
+
+        Arguments:
+
+        callbacks (list, optional): functions called with ``(event, data)`` whenever phase time or evaluation is recorded. (default: ``None``)
+        """
+        self.callbacks = list(callbacks or [])
+        self.reset()
+
+    def reset(self):
+        r"""Clears all collected statistics"""
+        self.phases = {'mid': 0.0, 'columns': 0.0, 'compile': 0.0, 'evaluate': 0.0}
+        self.counters = {'columns': 0, 'compilations': 0, 'evaluations': 0, 'finditer': 0, 'findall': 0, 'characters_scanned': 0}
+        self.evaluations = [] # dictionaries with ``len_left``, ``len_right`` and ``passed`` for every evaluation
+
+    def emit(self, event, data):
+        for callback in self.callbacks:
+            callback(event, data)
+
+    def add_time(self, phase, seconds):
+        r"""Adds ``seconds`` to wall time of ``phase``"""
+        self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+        if self.callbacks:
+            self.emit('phase', {'phase': phase, 'seconds': seconds})
+
+    def count(self, name, value = 1):
+        r"""Increases counter ``name`` by ``value``"""
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def record_evaluation(self, len_left, len_right, passed, seconds):
+        r"""Records outcome of single evaluation of regex with ``len_left`` and ``len_right`` neighbourhood blocks"""
+        record = {'len_left': len_left, 'len_right': len_right, 'passed': passed}
+        self.evaluations.append(record)
+        self.counters['evaluations'] += 1
+        self.add_time('evaluate', seconds)
+        if self.callbacks:
+            self.emit('evaluation', record)
+
+    def timed_columns(self, generate_next_part):
+        r"""Wraps ``generate_next_part`` function so that its time and number of generated columns are recorded"""
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            blocks = generate_next_part(*args, **kwargs)
+            self.add_time('columns', time.perf_counter() - start)
+            self.count('columns', sum(block is not None for block in blocks))
+            return blocks
+        return wrapper
+
+    def timed_evaluation(self, evaluate, generator):
+        r"""Wraps ``evaluate`` function of ``generator`` so that its time and outcome are recorded"""
+        def wrapper(ignore_mid = True, len_left = None, len_right = None):
+            start = time.perf_counter()
+            passed = evaluate(ignore_mid=ignore_mid, len_left=len_left, len_right=len_right)
+            len_left = len(generator.left_regex_builder) if len_left is None else len_left
+            len_right = len(generator.right_regex_builder) if len_right is None else len_right
+            self.record_evaluation(len_left, len_right, passed, time.perf_counter() - start)
+            return passed
+        return wrapper
+
+    def as_dict(self):
+        r"""Returns statistics as dictionary ready to be exported"""
+        return {'phases': dict(self.phases), 'counters': dict(self.counters), 'evaluations': list(self.evaluations)}
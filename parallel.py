@@ -0,0 +1,131 @@
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+import re
+
+from budget import BudgetExceeded
+from regos import check_spans
+
+shards = [] # shards of (string, spans) pairs available in worker process, set by ``init_worker``
+
+def init_worker(corpus_shards):
+    r"""Stores shards of corpus in worker process, so they are sent only once per pool"""
+    global shards
+    shards = corpus_shards
+
+def check_shard(pattern, flags, index):
+    r"""
+    Checks all strings of one shard in worker process
+
+    Arguments:
+
+    pattern (str): regex with part of interest in 1st group
+    flags (int): flags of ``re`` module
+    index (int): index of shard
+
+    Returns:
+
+    (int): position of first failing string in shard or None if all strings are matched correctly
+    """
+    regex = re.compile(pattern, flags) # compiled once per worker, ``re`` caches recently used patterns
+    for position, (string, spans) in enumerate(shards[index]):
+        if not check_spans(regex, string, spans):
+            return position
+    return None
+
+class ParallelEvaluator:
+    r"""
+    Evaluation backend checking source strings of ``RegexGenerator`` in a pool of processes.
+    Strings, with their spans, are split into shards sent to workers once when pool starts, every evaluation sends only the pattern.
+    """
+
+    def __init__(self, generator, max_workers = None, chunk_size = 64, min_strings = 512, poll_interval = 0.05):
+        r"""
+        ParallelEvaluator initializer. Pool is started lazily on first evaluation that needs it.
+
+        Arguments:
+
+        generator (RegexGenerator): generator providing ``spans_index``
+        max_workers (int, optional): number of worker processes, number of processors if not set. (default: ``None``)
+        chunk_size (int, optional): number of source strings in one shard. (default: 64)
+        min_strings (int, optional): if there are fewer source strings then evaluation is done serially. (default: 512)
+        poll_interval (float, optional): number of seconds between checks of ``TrainingBudget`` of generator while waiting for workers. (default: 0.05)
+        """
+        self.generator = generator
+        self.max_workers = max_workers
+        self.chunk_size = chunk_size
+        self.min_strings = min_strings
+        self.poll_interval = poll_interval
+        self.executor = None
+        self.shards = []
+
+    def start(self):
+        r"""Splits source strings into shards and starts pool of workers"""
+        items = list(self.generator.spans_index.items())
+        self.shards = [items[i:i + self.chunk_size] for i in range(0, len(items), self.chunk_size)]
+        self.executor = ProcessPoolExecutor(max_workers=self.max_workers, initializer=init_worker, initargs=(self.shards,))
+
+    def close(self):
+        r"""Shuts down pool of workers"""
+        if self.executor is not None:
+            self.executor.shutdown(wait=True, cancel_futures=True)
+            self.executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def evaluate(self, ignore_mid = True, len_left = None, len_right = None):
+        r"""
+        Evaluates current regexp like ``RegexGenerator.evaluate_incremental``. Strings that failed recently are checked first in main process,
+        the rest is checked by workers. Evaluation stops and pending shards are cancelled as soon as any shard reports a mismatch.
+        Falls back to serial evaluation if there are fewer than ``min_strings`` source strings.
+
+        Arguments:
+
+        ignore_mid (bool, optional): Whether to ignore building mid regex. (default: True)
+        len_left (int, optional): if set - only ``len_left`` blocks of left neighbourhood are used. (default: ``None``)
+        len_right (int, optional): if set - only ``len_right`` blocks of right neighbourhood are used. (default: ``None``)
+        """
+        generator = self.generator
+        if len(generator.spans_index) < self.min_strings:
+            return generator.evaluate_incremental(ignore_mid=ignore_mid, len_left=len_left, len_right=len_right)
+
+        regex = generator.compile_pattern(generator.compile_from_builders(ignore_mid=ignore_mid, len_left=len_left, len_right=len_right))
+
+        for position, string in enumerate(generator.failed_strings):
+            if not generator.check_string(regex, string, generator.spans_index[string]):
+                if position:
+                    generator.failed_strings.insert(0, generator.failed_strings.pop(position))
+                return False
+
+        if self.executor is None:
+            self.start()
+
+        futures = {self.executor.submit(check_shard, regex.pattern, regex.flags, index): index for index in range(len(self.shards))}
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, timeout=self.poll_interval, return_when=FIRST_COMPLETED)
+            if generator.budget is not None:
+                try:
+                    generator.budget.check()
+                except BudgetExceeded:
+                    for other in pending:
+                        other.cancel()
+                    raise
+            for future in done:
+                position = future.result()
+                if generator.stats is not None:
+                    checked = self.shards[futures[future]][:None if position is None else position + 1]
+                    generator.stats.count('finditer', len(checked))
+                    generator.stats.count('characters_scanned', sum(len(string) for string, spans in checked))
+                if position is not None:
+                    for other in pending:
+                        other.cancel()
+                    string = self.shards[futures[future]][position][0]
+                    if string not in generator.failed_strings:
+                        generator.failed_strings.insert(0, string)
+                    return False
+
+        generator.failed_strings = []
+        return True
@@ -1,10 +1,152 @@
-from utils import listmap
+from utils import listmap, LRUCache
+from instrumentation import TrainingStats
+from budget import TrainingBudget, BudgetExceeded
+from itertools import islice
 from math import ceil
+import random
 import string
+import json
+import gzip
+import time
+import os
 import re
 
+# flags describing which regex classes capture given character
+LETTER = 1
+DIGIT = 2
+WORD = 4 # letters, digits and underscore, everything that ``\w`` captures
+WHITESPACE = 8
+PUNCTUATION = 16
+
+CHAR_FLAGS = [0] * 128 # lookup table of flags for every ASCII character, indexed by code point
+for char in string.ascii_letters:
+    CHAR_FLAGS[ord(char)] |= LETTER | WORD
+for char in string.digits:
+    CHAR_FLAGS[ord(char)] |= DIGIT | WORD
+for char in string.whitespace:
+    CHAR_FLAGS[ord(char)] |= WHITESPACE
+for char in string.punctuation:
+    CHAR_FLAGS[ord(char)] |= PUNCTUATION
+CHAR_FLAGS[ord('_')] |= WORD
+
+REGEX_SPECIAL = set('.^$*+?{}[]\\|()')
+
+BYTE_CHARS = [chr(code) for code in range(256)] # lookup table translating byte values read from ``bytes`` strings to characters
+PUNCTUATION_CODES = frozenset(map(ord, string.punctuation))
+
+# translation of ASCII digits to '0' and ASCII letters to 'a' and regex finding runs of the same character, used to split fragments into segments
+SEGMENT_KINDS = str.maketrans({**{char: '0' for char in string.digits}, **{char: 'a' for char in string.ascii_letters}})
+SEGMENT_RUNS = re.compile(r'(.)\1*', re.S)
+
+def escape_literal(char):
+    r"""Escapes ``char`` if it has special meaning in regex"""
+    return f'\\{char}' if char in REGEX_SPECIAL else char
+
+def escape_class(chars):
+    r"""Escapes characters joined in ``chars`` that have special meaning inside of regex character class"""
+    return chars.replace('\\','\\\\').replace(']','\\]').replace('^','\\^').replace('-','\\-').replace('(','\\(').replace(')','\\)').replace('{','\\{').replace('[','\\[')
+
+def class_covers(chars, mask, literals, block):
+    r"""
+    Checks whether every character of ``chars`` is captured by character class ``block``
+
+    Arguments:
+
+    chars (set): set of characters
+    mask (int): flags of general classes (``\w``, ``\d``, ``\s``) included in ``block``
+    literals (set): set of characters included in ``block`` literally
+    block (str): regex of character class, used only for characters outside of ``CHAR_FLAGS`` table
+
+    Returns:
+
+    (bool): True if all characters are captured
+    """
+    for char in chars:
+        code = ord(char)
+        if code < 128:
+            if not (CHAR_FLAGS[code] & mask or char in literals):
+                return False
+        elif not re.fullmatch(block, char):
+            return False
+    return True
+
+def check_spans(regex, string, spans):
+    r"""
+    Checks whether ``regex`` applied to ``string`` finds exactly the selected ``spans``. String is scanned once and check stops on first unexpected match.
+
+    Arguments:
+
+    regex (re.Pattern): compiled regex with part of interest in 1st group
+    string (str): source string
+    spans (set): set of spans selected in ``string``
+
+    Returns:
+
+    (bool): True if string is matched correctly
+    """
+    spans_found = set()
+    for s in regex.finditer(string):
+        try:
+            span = s.span(1)
+        except:
+            return False ## group 1 should always exist and match at least empty string
+        if span not in spans:
+            return False
+        spans_found.add(span)
+
+    return len(spans_found) == len(spans)
+
+def split_quantifier(char):
+    r"""
+    Splits regex block created by ``RegexGenerator.find_block_char`` into its base and bounds of repetitions
+
+    Returns:
+
+    (tuple): (base, minimum, maximum), for example ``('\d', 0, 1)`` for ``\d{0,1}``
+    """
+    if char.endswith('{0,1}'):
+        return char[:-5], 0, 1
+    if char in ('.?', r'[\s\S]?'):
+        return char[:-1], 0, 1
+    return char, 1, 1
+
+def compact_parts(parts, flexible = 0):
+    r"""
+    Joins ``char`` of regex parts merging runs of blocks with the same base into one quantified block, e.g. ``\d\d\d\d{0,1}`` into ``\d{3,4}``
+
+    Arguments:
+
+    parts (iterable): ``RegexPart`` objects in order of regex
+    flexible (int, optional): bounds of merged runs are widened by that many repetitions, e.g. ``\s{18,22}`` instead of ``\s{20}``. (default: 0)
+
+    Returns:
+
+    (str): string regex
+    """
+    runs = [] # lists [base, minimum, maximum, number of blocks, first block]
+    for part in parts:
+        base, minimum, maximum = split_quantifier(part.char)
+        if runs and runs[-1][0] == base:
+            runs[-1][1] += minimum
+            runs[-1][2] += maximum
+            runs[-1][3] += 1
+        else:
+            runs.append([base, minimum, maximum, 1, part.char])
+
+    regex = ''
+    for base, minimum, maximum, blocks, char in runs:
+        if blocks == 1:
+            regex += char
+            continue
+        minimum, maximum = max(0, minimum - flexible), maximum + flexible
+        regex += f'{base}{{{minimum}}}' if minimum == maximum else f'{base}{{{minimum},{maximum}}}'
+    return regex
+
 class RegexPart:
     r"""Class for storing information about regex building blocks capturing one specific character in searched string"""
+
+    __slots__ = ('char', 'options', 'percentage')
+
     def __init__(self, char, options, percentage):
         r"""
         RegexPart initializer
@@ -22,8 +164,12 @@ class RegexPart:
 class Data_Entry:
     r"""
     Class storing string and its part of interest in convenient form. Provides useful methods for viewing the entry.
+    Neighbourhoods are not copied, entry keeps reference to the source string and walks through it using offsets.
     """
-    def __init__(self, string, selection):
+
+    __slots__ = ('string', 'selection', 'max_nbh', 'left_pos', 'left_step', 'left_stop', 'mid_pos', 'mid_stop', 'right_pos', 'right_stop')
+
+    def __init__(self, string, selection, max_nbh = None):
         r"""
         Data_Entry initializer. 
 
@@ -31,6 +177,7 @@ class Data_Entry:
 
         string (str): whole string containing part of interest to be extracted
         selection (tuple): tuple containing ``start`` and ``end`` (exclusive) indices of part of interest
+        max_nbh (int, optional): if set - neighbourhoods extend at most ``max_nbh`` characters from part of interest. (default: ``None``)
 
         Example of inputs: 
 
@@ -44,57 +191,206 @@ class Data_Entry:
         
         self.string = string
         self.selection = selection
-        self.search_fragment = string[selection[0]:selection[1]] # actual searched string
-        self.left_nbh = string[:selection[0]] # left neighbourhood of selection part
-        self.right_nbh = string[selection[1]:] # right neighbourhood of selection part
+        self.max_nbh = max_nbh
+
+    @property
+    def search_fragment(self):
+        r"""Actual searched string"""
+        return self.string[self.selection[0]:self.selection[1]]
+
+    @property
+    def left_start(self):
+        r"""Index in ``string`` at which left neighbourhood starts"""
+        if self.max_nbh is None:
+            return 0
+        return max(0, self.selection[0] - self.max_nbh)
+
+    @property
+    def right_end(self):
+        r"""Index in ``string`` at which right neighbourhood ends (exclusive)"""
+        if self.max_nbh is None:
+            return len(self.string)
+        return min(len(self.string), self.selection[1] + self.max_nbh)
+
+    @property
+    def left_nbh(self):
+        r"""Left neighbourhood of selection part"""
+        return self.string[self.left_start:self.selection[0]]
+
+    @property
+    def right_nbh(self):
+        r"""Right neighbourhood of selection part"""
+        return self.string[self.selection[1]:self.right_end]
 
     def __str__(self):
         return f"{self.string} with selection {self.selection} which is {self.search_fragment}\nLeft neighbourhood: {self.left_nbh}\nRight neighbourhood: {self.right_nbh}"
 
     def initialize_generators(self, left_reversed = True):
         r"""
-        Initilizes three generators iterating through left neighbourhood of part of interest, through it itself and through right neighbourhood of it
+        Initilizes three cursors iterating through left neighbourhood of part of interest, through it itself and through right neighbourhood of it
 
         Arguments:
 
         left_reversed (bool, optional):  if set to ``True`` then left neighbourhood is iterated in reverse. (default: ``True``)
         """
+        start, end = self.selection
         if left_reversed:
-            self.left_gen = iter(self.left_nbh[::-1])
+            self.left_pos, self.left_step, self.left_stop = start - 1, -1, self.left_start - 1
         else:
-            self.left_gen = iter(self.left_nbh)
+            self.left_pos, self.left_step, self.left_stop = self.left_start, 1, start
         
-        self.mid_gen = iter(self.search_fragment)
-        self.right_gen = iter(self.right_nbh)
+        self.mid_pos, self.mid_stop = start, max(start, min(end, len(self.string)))
+        self.right_pos, self.right_stop = end, max(end, self.right_end)
 
     def next_left(self):
-        r"""Returns next character of left neighbourhood iterator or empty string if its not present"""
-
-        try:
-            return next(self.left_gen)
-        except:
+        r"""Returns next character of left neighbourhood or empty string if its not present"""
+        if self.left_pos == self.left_stop:
             return ''
+        char = self.string[self.left_pos]
+        self.left_pos += self.left_step
+        return char
     
     def next_mid(self):
-        r"""Returns next character of left neighbourhood iterator or empty string if its not present"""
-        try:
-            return next(self.mid_gen)
-        except:
+        r"""Returns next character of part of interest or empty string if its not present"""
+        if self.mid_pos == self.mid_stop:
             return ''
+        char = self.string[self.mid_pos]
+        self.mid_pos += 1
+        return char
 
     def next_right(self):
-        r"""Returns next character of right neighbourhood iterator or empty string if its not present"""
-        try:
-            return next(self.right_gen)
-        except:
+        r"""Returns next character of right neighbourhood or empty string if its not present"""
+        if self.right_pos == self.right_stop:
             return ''
+        char = self.string[self.right_pos]
+        self.right_pos += 1
+        return char
+
+    def column_char(self, side, index):
+        r"""
+        Returns character of ``index`` column of neighbourhood or part of interest in order of iteration, without moving cursors
+
+        Arguments:
+
+        side (str): ``'left'``, ``'mid'`` or ``'right'``
+        index (int): index of column
+
+        Returns:
+
+        (str): character or empty string if its not present
+        """
+        start, end = self.selection
+        if side == 'left':
+            position = start - 1 - index if self.left_step == -1 else self.left_start + index
+            present = self.left_start <= position < start
+        elif side == 'mid':
+            position = start + index
+            present = position < self.mid_stop
+        else:
+            position = end + index
+            present = position < self.right_stop
+        return self.string[position] if present else ''
+
+    def seek(self, left = 0, mid = 0, right = 0):
+        r"""
+        Moves cursors so that next characters returned are ones of ``left``, ``mid`` and ``right`` columns, as if that many were already iterated.
+        Generators have to be initialized first.
+        """
+        start, end = self.selection
+        if self.left_step == -1:
+            self.left_pos = max(self.left_stop, start - 1 - left)
+        else:
+            self.left_pos = min(self.left_stop, self.left_start + left)
+        self.mid_pos = min(self.mid_stop, start + mid)
+        self.right_pos = min(self.right_stop, end + right)
+
+class MatchDiagnostics:
+    r"""
+    Lazy view on matches of left, mid and right regex parts in strings of ``data_entries``. Useful for debugging bad patterns.
+    Nothing is matched until attribute is read, results are cached afterwards.
+    """
+
+    def __init__(self, generator, left_regex, mid_regex, right_regex):
+        r"""
+        MatchDiagnostics initializer
+
+        Arguments:
+
+        generator (RegexGenerator): generator providing ``data_entries`` and ``compile_pattern``
+        left_regex (str): left part of regex
+        mid_regex (str): mid part of regex
+        right_regex (str): right part of regex
+        """
+        self.generator = generator
+        self.data_entries = generator.data_entries
+        self.regexes = {'left': left_regex, 'mid': mid_regex, 'right': right_regex}
+        self.matches = {}
+        self.string_counts = {}
+
+    def get_matches(self, part):
+        r"""
+        Returns list of all matches of ``part`` regex in strings of ``data_entries``
+
+        Arguments:
+
+        part (str): one of ``'left'``, ``'mid'``, ``'right'``
+        """
+        if part not in self.matches:
+            regex = self.generator.compile_pattern(self.regexes[part])
+            stats = self.generator.stats
+            found = []
+            for entry in self.data_entries:
+                found.extend(regex.findall(entry.string))
+                if stats is not None:
+                    stats.count('findall')
+                    stats.count('characters_scanned', len(entry.string))
+            self.matches[part] = found
+        return self.matches[part]
+
+    @property
+    def left(self):
+        return self.get_matches('left')
+
+    @property
+    def mid(self):
+        return self.get_matches('mid')
+
+    @property
+    def right(self):
+        return self.get_matches('right')
+
+    def counts(self):
+        r"""
+        Returns list with tuple (left, mid, right) of match counts for every entry of ``data_entries``
+        """
+        regexes = [self.generator.compile_pattern(self.regexes[part]) for part in ('left', 'mid', 'right')]
+        counts = []
+        for entry in self.data_entries:
+            if entry.string not in self.string_counts:
+                self.string_counts[entry.string] = tuple(sum(1 for _ in regex.finditer(entry.string)) for regex in regexes)
+            counts.append(self.string_counts[entry.string])
+        return counts
 
 class RegexGenerator:
     r"""
     Class providing regex generation capabilities. It is based on grid iterative algorithm.
     """
 
-    def __init__(self):
+    block_cache = LRUCache(4096) # maps column signatures to decided block characters, shared by all generators in the process
+    byte_block_cache = LRUCache(4096) # the same for columns of byte values, see ``find_correct_block_code``
+
+    def __init__(self, pattern_cache_size = 256, as_bytes = False):
+        r"""
+        RegexGenerator initializer
+
+        Arguments:
+
+        pattern_cache_size (int, optional): number of compiled patterns kept in ``pattern_cache``. (default: 256)
+        as_bytes (bool, optional): if set to ``True`` then source strings are stored as ASCII ``bytes``, columns are read as byte values and
+            evaluation uses bytes patterns. Emitted regex is ASCII string usable on ``str`` (with ``re.ASCII`` flag for identical classes)
+            and, encoded, on ``bytes``. (default: ``False``)
+        """
+        self.as_bytes = as_bytes
         self.data_entries = []
         self.spans_list = []
         self.all_searched_fragments = []
@@ -105,24 +401,44 @@ class RegexGenerator:
         self.mid_regex = ""
         self.right_regex = ""
         self.train_part_end_index = None # This will be the index to split ``data_entries`` to train and test sets if its sufficiently long
+        self.spans_index = {} # maps every source string to set of spans selected in it
+        self.failed_strings = [] # source strings that failed recent incremental evaluations, most recent first
+        self.trained_entries = 0 # number of first ``data_entries`` whose columns are already reflected in builders
+        self.duplicates = {} # maps index of representative in ``data_entries`` to entries with identical windows collapsed into it
+
+        self.pattern_cache = LRUCache(pattern_cache_size) # compiled patterns keyed by (pattern, flags)
+        self.compilations = 0 # number of patterns compiled during last ``evolve`` run
+        self.diagnostics = None # ``MatchDiagnostics`` of regex parts compiled most recently
+        self.stats = None # ``TrainingStats`` recording training, nothing is recorded if not set
+        self.cost_report = None # candidates scored by last ``optimize_cost`` run and cost per KB of the chosen one
+        self.compaction_report = None # lengths and scanning times of regex before and after last ``compact`` run
+        self.budget = None # ``TrainingBudget`` of running ``evolve``, checked before every scanned string
+        self.budget_report = None # precision and recall of regex returned by last ``evolve`` run with budget and reason it stopped
+        self.sampling_report = None # numbers of rounds and of entries actually used by last ``evolve_sampled`` run
 
         self.set_letters = set(string.ascii_letters)
         self.set_digits = set(string.digits)
         self.set_punctuation = set(string.punctuation)
         self.set_whitespace = set(string.whitespace)
 
-    def parse_data(self, data, start_end_keys = True, append = False, inclusive_end = True, alternative_keys = []):
+    def parse_data(self, data, start_end_keys = True, append = False, inclusive_end = True, alternative_keys = [], max_nbh = None, deduplicate = False, cache_dir = None):
         r"""
         This method parses data provided in list-of-dictionaries fashion to list of Data_Entry objects stored inside ``RegexGenerator`` object.
 
 
         Arguments:
 
-        data (list): list of dictionary objects having fields ``string`` and ``selections`` 
+        data (list): list of dictionary objects having fields ``string`` and ``selections``, path to JSONL file with such objects is accepted too
         start_end_keys (bool, optional): informs if spans in dict format are part of dictionary with keys ['start', 'end'] or just in tuple (start, end) form. Defaults to True
-        append (bool, optional): if set to ``True`` data parsed is appended to currently stored. (default: ``False``)
+        append (bool, optional): if set to ``True`` data parsed is appended to currently stored and next ``evolve`` resumes from builders, otherwise builders are cleared. (default: ``False``)
         inclusive_end (bool, optional): if set to ``True`` then ``end`` index of selections will be treated inclusively in contrary to python's standard indexing. (default: ``True``)
         alternative_keys (list, optional): list of two strings that will replace original ``string`` and ``selection`` keys.
+        max_nbh (int, optional): if set - neighbourhoods of every selection are limited to ``max_nbh`` characters on each side. (default: ``None``)
+        deduplicate (bool, optional): if set to ``True`` then entries with identical left, mid and right windows are collapsed into weighted
+            representatives, see ``deduplicate_entries``. Works best with ``max_nbh``. (default: ``False``)
+        cache_dir (str, optional): if set - parsed entries are stored in ``corpus_cache.CorpusCache`` in this directory and reused
+            by later calls with the same records and options instead of parsing them again. ``data`` has to be path to JSONL file
+            or iterable of JSON strings, decoding of which is skipped on cache hit. (default: ``None``)
 
         Example of input arguments:
 
@@ -142,38 +458,293 @@ class RegexGenerator:
         """
         if not append:
             self.data_entries = []
+            self.failed_strings = []
+            self.trained_entries = 0
+            self.duplicates = {}
+            self.clear_builders()
+
+        string_key, selection_key = self.data_keys(alternative_keys)
+        offset = 1 if inclusive_end else 0 # offset for slicing if selections in dict are provided inclusively
+
+        if cache_dir is not None:
+            self.data_entries.extend(self.parse_cached(data, cache_dir, string_key, selection_key, start_end_keys, offset, max_nbh))
+        else:
+            # Iterates over dicts with possibly multiple selections stored for each string
+            for entry in self.iter_records(data):
+                self.data_entries.extend(self.parse_record(entry, string_key, selection_key, start_end_keys, offset, max_nbh))
+
+        if deduplicate:
+            self.deduplicate_entries()
+
+        # first 80% of entries, counting duplicates, form train set
+        weights = self.entry_weights()
+        if sum(weights) >= 5:
+            target, total = ceil(sum(weights) * 0.8), 0
+            for index, weight in enumerate(weights):
+                total += weight
+                if total >= target:
+                    self.train_part_end_index = index + 1
+                    break
+
+        self.save_spans_data()
+        self.save_selections_data()
+
+    def parse_cached(self, data, cache_dir, string_key, selection_key, start_end_keys = True, offset = 1, max_nbh = None):
+        r"""
+        Returns ``Data_Entry`` objects of ``data`` loaded from corpus cache in ``cache_dir``. On cache miss records are parsed
+        with ``parse_record`` and stored. Key covers records, keys, span format, ``max_nbh`` and ``as_bytes``, see ``corpus_cache.CorpusCache.key``.
 
+        Returns:
+
+        (list): list of ``Data_Entry`` objects with initialized generators
+        """
+        from corpus_cache import CorpusCache
+
+        cache = CorpusCache(cache_dir)
+        if not isinstance(data, (str, os.PathLike, list)):
+            data = list(data) # records are read twice, for key and for parsing
+        options = {'version': 2, 'keys': [string_key, selection_key], 'start_end_keys': start_end_keys, 'offset': offset, 'max_nbh': max_nbh, 'as_bytes': self.as_bytes}
+        key = cache.key(data, options)
+        cached = cache.load(key)
+        if self.stats is not None:
+            self.stats.count('corpus_cache_misses' if cached is None else 'corpus_cache_hits')
+
+        if cached is None:
+            entries = [entry for record in self.iter_records(data) for entry in self.parse_record(record, string_key, selection_key, start_end_keys, offset, max_nbh)]
+            positions = {string: index for index, string in enumerate(dict.fromkeys(entry.string for entry in entries))}
+            cache.store(key, list(positions), [(positions[entry.string], entry.selection[0], entry.selection[1], entry.max_nbh) for entry in entries])
+            return entries
+
+        strings, rows = cached
+        entries = []
+        for index, start, end, max_nbh in rows:
+            entry = Data_Entry(strings[index], (start, end), max_nbh)
+            entry.initialize_generators()
+            entries.append(entry)
+        return entries
+
+    def deduplicate_entries(self):
+        r"""
+        Collapses ``data_entries`` with identical left neighbourhood, searched fragment and right neighbourhood into the first of them.
+        Collapsed entries are kept in ``duplicates`` and used only for span verification, columns are generated from representatives.
+        Representatives keep their order, so entries collapsed before stay at their positions.
+        """
+        windows = {} # maps (left, mid, right) window to index of its representative
+        representatives = []
+        for entry in self.data_entries:
+            window = (entry.left_nbh, entry.search_fragment, entry.right_nbh)
+            index = windows.get(window)
+            if index is None:
+                windows[window] = len(representatives)
+                representatives.append(entry)
+            else:
+                self.duplicates.setdefault(index, []).append(entry)
+        self.data_entries = representatives
+
+    def entry_weights(self):
+        r"""Returns list with number of entries represented by every entry of ``data_entries``"""
+        return [1 + len(self.duplicates.get(index, ())) for index in range(len(self.data_entries))]
+
+    def expand_entries(self, start = 0, stop = None):
+        r"""Returns entries of ``data_entries[start:stop]`` followed directly by their collapsed duplicates"""
+        stop = len(self.data_entries) if stop is None else stop
+        return [entry for index in range(start, stop) for entry in [self.data_entries[index]] + self.duplicates.get(index, [])]
+
+    def expand_duplicates(self):
+        r"""Reverts ``deduplicate_entries``, duplicates are placed right after their representatives and split index is moved accordingly"""
+        if not self.duplicates:
+            return
+        if self.train_part_end_index:
+            self.train_part_end_index = sum(self.entry_weights()[:self.train_part_end_index])
+        self.data_entries = self.expand_entries()
+        self.duplicates = {}
+
+    def data_keys(self, alternative_keys = []):
+        r"""
+        Returns tuple (string_key, selection_key) of keys used in data dictionaries
+
+        Arguments:
+
+        alternative_keys (list, optional): list of two strings that will replace original ``string`` and ``selection`` keys.
+        """
         if alternative_keys:
             if len(alternative_keys) != 2:
                 raise Exception('alternative_keys has to be of length 2')
             elif alternative_keys[0] == alternative_keys[1]:
                 raise Exception('keys have to be different')
+            return alternative_keys[0], alternative_keys[1]
+        return 'string', 'selections'
 
-        string_key = 'string' if not alternative_keys else alternative_keys[0]
-        selection_key = 'selections' if not alternative_keys else alternative_keys[1]
-        offset = 1 if inclusive_end else 0 # offset for slicing if selections in dict are provided inclusively
+    def parse_record(self, record, string_key, selection_key, start_end_keys = True, offset = 1, max_nbh = None):
+        r"""
+        Creates ``Data_Entry`` with initialized generators for each selection of single dictionary from data. Other fields of dictionary are not kept.
 
-        # Iterates over dicts with possibly multiple selections stored for each string
-        for entry in data:
-            d_entries = []
-            # Creates ``Data_Entry`` for each selection (`span`) in string
-            for span in entry[selection_key]:
-                if start_end_keys:
-                    d_entries.append(Data_Entry(entry[string_key], (span['start'],span['end']+offset)))
-                else:
-                    d_entries.append(Data_Entry(entry[string_key], (span[0],span[1]+offset)))
-                d_entries[-1].initialize_generators()
+        Arguments:
+
+        record (dict): dictionary with string and its selections
+        string_key (str): key of string in ``record``
+        selection_key (str): key of selections in ``record``
+        start_end_keys (bool, optional): informs if spans are dictionaries with keys ['start', 'end'] or tuples (start, end). (default: ``True``)
+        offset (int, optional): number added to ``end`` of every span. (default: 1)
+        max_nbh (int, optional): if set - neighbourhoods are limited to ``max_nbh`` characters on each side. (default: ``None``)
 
-            self.data_entries.extend(d_entries)
+        Returns:
 
+        (list): list of ``Data_Entry`` objects
+        """
+        d_entries = []
+        source = record[string_key] # all entries of this string share single reference to it
+        if self.as_bytes:
+            try:
+                source = source.encode('ascii') if isinstance(source, str) else bytes(source)
+            except UnicodeEncodeError:
+                raise Exception('Only ASCII strings can be parsed if as_bytes is set')
+        # Creates ``Data_Entry`` for each selection (`span`) in string
+        for span in record[selection_key]:
+            if start_end_keys:
+                d_entries.append(Data_Entry(source, (span['start'],span['end']+offset), max_nbh))
+            else:
+                d_entries.append(Data_Entry(source, (span[0],span[1]+offset), max_nbh))
+            d_entries[-1].initialize_generators()
+        return d_entries
 
-        if len(self.data_entries) >= 5:
+    @staticmethod
+    def iter_records(source):
+        r"""
+        Lazily yields dictionaries from ``source``
 
-            self.train_part_end_index = int(ceil(len(self.data_entries) * 0.8))
+        Arguments:
 
-        self.save_spans_data()
+        source (str or iterable): path to JSONL file or iterable of dictionaries or JSON strings
+        """
+        if isinstance(source, (str, os.PathLike)):
+            with open(source, encoding='utf-8') as f:
+                for line in f:
+                    if line.strip():
+                        yield json.loads(line)
+        else:
+            for record in source:
+                yield json.loads(record) if isinstance(record, (str, bytes)) else record
+
+    def parse_stream(self, source, start_end_keys = True, append = False, inclusive_end = True, alternative_keys = [], max_nbh = None, chunk_size = 1024, test_every = 5, max_records = None, seed = 0):
+        r"""
+        Streaming version of ``parse_data``. Records are read lazily in chunks of ``chunk_size`` and only ``Data_Entry`` objects are kept.
+        Train/test split is maintained online, every ``test_every``-th entry goes to test set and ``data_entries`` is ordered so that
+        train entries precede ``train_part_end_index``. If ``max_records`` is set then uniform reservoir sample of records is kept,
+        so memory stays bounded regardless of size of ``source``.
+
+        Arguments:
+
+        source (str or iterable): path to JSONL file or iterable of dictionaries (or JSON strings) with fields ``string`` and ``selections``
+        start_end_keys (bool, optional): informs if spans in dict format are part of dictionary with keys ['start', 'end'] or just in tuple (start, end) form. Defaults to True
+        append (bool, optional): if set to ``True`` data parsed is appended to currently stored and next ``evolve`` resumes from builders, otherwise builders are cleared. (default: ``False``)
+        inclusive_end (bool, optional): if set to ``True`` then ``end`` index of selections will be treated inclusively. (default: ``True``)
+        alternative_keys (list, optional): list of two strings that will replace original ``string`` and ``selection`` keys.
+        max_nbh (int, optional): if set - neighbourhoods of every selection are limited to ``max_nbh`` characters on each side. (default: ``None``)
+        chunk_size (int, optional): number of records parsed at once. (default: 1024)
+        test_every (int, optional): every ``test_every``-th entry is put into test set. (default: 5)
+        max_records (int, optional): if set - at most ``max_records`` records are kept using reservoir sampling. (default: ``None``)
+        seed (int, optional): seed of reservoir sampling. (default: 0)
+        """
+        string_key, selection_key = self.data_keys(alternative_keys)
+        offset = 1 if inclusive_end else 0
+
+        if append:
+            self.expand_duplicates()
+            split = self.train_part_end_index or len(self.data_entries)
+            train, test = self.data_entries[:split], self.data_entries[split:]
+        else:
+            train, test = [], []
+            self.spans_index = {}
+            self.failed_strings = []
+            self.duplicates = {}
+            self.clear_builders()
+        self.trained_entries = 0 # entries are reordered, so all of them are checked against builders by ``warm_start``
+
+        counter = len(train) + len(test)
+        reservoir = [] # lists of (entry, is_test) for kept records, used only with ``max_records``
+        rnd = random.Random(seed)
+        seen = 0
+        records = self.iter_records(source)
+        while True:
+            chunk = list(islice(records, chunk_size))
+            if not chunk:
+                break
+            for record in chunk:
+                parsed = []
+                for entry in self.parse_record(record, string_key, selection_key, start_end_keys, offset, max_nbh):
+                    counter += 1
+                    parsed.append((entry, counter % test_every == 0))
+
+                if max_records is None:
+                    for entry, is_test in parsed:
+                        (test if is_test else train).append(entry)
+                        self.spans_index.setdefault(entry.string, set()).add(entry.selection)
+                elif seen < max_records:
+                    reservoir.append(parsed)
+                else:
+                    index = rnd.randrange(seen + 1)
+                    if index < max_records:
+                        reservoir[index] = parsed
+                seen += 1
+
+        for parsed in reservoir:
+            for entry, is_test in parsed:
+                (test if is_test else train).append(entry)
+                self.spans_index.setdefault(entry.string, set()).add(entry.selection)
+
+        self.data_entries = train + test
+        self.train_part_end_index = len(train) if len(self.data_entries) >= 5 and test else None
+        self.spans_list = [entry.selection for entry in self.data_entries]
         self.save_selections_data()
 
+    def compile_pattern(self, pattern, flags = 0):
+        r"""
+        Returns compiled ``pattern`` reusing previously compiled objects stored in ``pattern_cache``
+
+        Arguments:
+
+        pattern (str): regex string
+        flags (int, optional): flags of ``re`` module. (default: 0)
+
+        Returns:
+
+        (re.Pattern): compiled regex
+        """
+        if self.as_bytes and isinstance(pattern, str):
+            pattern = pattern.encode('utf-8')
+        key = (pattern, flags)
+        compiled = self.pattern_cache.get(key)
+        if compiled is None:
+            start = time.perf_counter() if self.stats is not None else None
+            compiled = re.compile(pattern, flags)
+            self.pattern_cache.put(key, compiled)
+            self.compilations += 1
+            if start is not None:
+                self.stats.add_time('compile', time.perf_counter() - start)
+                self.stats.count('compilations')
+        return compiled
+
+    def enable_stats(self, callbacks = None):
+        r"""
+        Attaches new ``TrainingStats`` to generator, so that phases of ``evolve`` are timed and counted
+
+        Arguments:
+
+        callbacks (list, optional): functions called with ``(event, data)`` whenever phase time or evaluation is recorded. (default: ``None``)
+
+        Returns:
+
+        (TrainingStats): attached stats object
+        """
+        self.stats = TrainingStats(callbacks)
+        return self.stats
+
+    def disable_stats(self):
+        r"""Detaches ``TrainingStats`` from generator and returns it"""
+        stats, self.stats = self.stats, None
+        return stats
+
     def compile_from_builders(self, ignore_mid = True, left_reversed = True, len_left = None, len_mid = None, len_right = None):
         r"""
         Updates string regex parts using corresponding builders
@@ -182,7 +753,7 @@ class RegexGenerator:
 
         ignore_mid (bool, optional): if set to ``True`` then ``mid_regex`` will not be rebuilt. (default: ``True``)
         left_reversed (bool, optional):  if set to ``True`` then ``left_regex_builder`` is reversed before compiling into string regex. (default: ``True``)
-        len_left (int, optional): if set - only ``len_left`` blocks will be compiled. (default: ``None``)
+        len_left (int, optional): if set - only ``len_left`` blocks closest to part of interest will be compiled. (default: ``None``)
         len_mid (int, optional): if set - only ``len_mid`` blocks will be compiled. (default: ``None``)
         len_right (int, optional): if set - only ``len_right`` blocks will be compiled. (default: ``None``)
 
@@ -190,151 +761,282 @@ class RegexGenerator:
 
         (str): string regex
         """
+        start = time.perf_counter() if self.stats is not None else None
         
         # used if left neighbourhood was iterated in reverse and thus regex was created from its end
         if left_reversed:
-            self.left_regex = ''.join([part.char for part in list(reversed(self.left_regex_builder))])[:len_left]
+            self.left_regex = ''.join([part.char for part in reversed(self.left_regex_builder[:len_left])])
         else:
             self.left_regex = ''.join([part.char for part in self.left_regex_builder][:len_left])
         if not ignore_mid:
             self.mid_regex = ''.join([part.char for part in self.mid_regex_builder][:len_mid])
         self.right_regex = ''.join([part.char for part in self.right_regex_builder][:len_right])
         
-        self.left_regex_match = []
-        self.mid_regex_match = []
-        self.right_regex_match = []
-        for entry in self.data_entries:
-            self.left_regex_match.extend(re.findall(self.left_regex, entry.string))
-            self.mid_regex_match.extend(re.findall(self.mid_regex, entry.string))
-            self.right_regex_match.extend(re.findall(self.right_regex, entry.string))
+        self.diagnostics = MatchDiagnostics(self, self.left_regex, self.mid_regex, self.right_regex)
+        if start is not None:
+            self.stats.add_time('compile', time.perf_counter() - start)
         
         return f'{self.left_regex}({self.mid_regex}){self.right_regex}'
 
+    @property
+    def left_regex_match(self):
+        r"""All matches of ``left_regex`` in strings of ``data_entries``, computed on first access"""
+        return self.diagnostics.left if self.diagnostics else []
+
+    @property
+    def mid_regex_match(self):
+        r"""All matches of ``mid_regex`` in strings of ``data_entries``, computed on first access"""
+        return self.diagnostics.mid if self.diagnostics else []
+
+    @property
+    def right_regex_match(self):
+        r"""All matches of ``right_regex`` in strings of ``data_entries``, computed on first access"""
+        return self.diagnostics.right if self.diagnostics else []
+
     def save_spans_data(self):
-        r"""Creates ``spans_list`` list inside object that captures all spans from ``data_entries``"""
+        r"""Creates ``spans_list`` list inside object that captures all spans from ``data_entries`` and ``spans_index`` grouping them, duplicates included, by source string"""
 
         self.spans_list = [entry.selection for entry in self.data_entries]
+        self.spans_index = {}
+        for entry in self.expand_entries():
+            self.spans_index.setdefault(entry.string, set()).add(entry.selection)
     
     def save_selections_data(self):
         self.all_searched_fragments = [entry.search_fragment for entry in self.data_entries]
         
 
-    def generate_next_part(self, left = True, mid = False, right = True):
+    def find_correct_block_char(self, options_set_train, options_set, optional, n_options):
         r"""
-        Generates next RegexParts for specified parts of regex
+        Generates ``RegexPart`` for one column of characters. Decisions are memoized in ``block_cache`` under column signature
+        made of train set, characters present only in test set and ``optional`` flag.
 
         Arguments:
 
-        left (bool, optional): if set to ``True``, ``left_gen`` of all ``data_entries`` will be used.
-        mid (bool, optional): if set to ``True``, ``mid_gen`` of all ``data_entries`` will be used.
-        right (bool, optional): if set to ``True``, ``right_gen`` of all ``data_entries`` will be used.
+        options_set_train (set): set of characters of the column from train set. Contains empty string if any train entry is exhausted
+        options_set (set): set of all characters of the column, test set is included
+        optional (bool): if set to ``True`` then some entry is exhausted and thus character should be optional
+        n_options (int): number of entries forming the column
 
-        Returns
+        Returns:
 
-        (tuple): (left_block, mid_block, right_block) - ``RegexPart`` objects.
-        
+        (RegexPart): RegexPart object representing fragment matching all options.
 
         """
+        chars_train = options_set_train.difference({''})
+        signature = (frozenset(options_set_train), frozenset(options_set.difference(chars_train)), optional)
+        char = self.block_cache.get(signature)
+        if char is None:
+            char = self.find_block_char(options_set_train, options_set, optional)
+            self.block_cache.put(signature, char)
+        return RegexPart(char, options_set_train, len(options_set_train)/n_options)
+
+    def find_block_char(self, options_set_train, options_set, optional):
+        r"""
+        Decides regex capturing one column of characters. Character classes are chosen using ``CHAR_FLAGS`` bitmasks,
+        regex engine is used only for characters outside of that table.
 
-        def find_correct_block_char(options):
-            r"""
-            Generates char element of ``RegexPart``.
+        Arguments:
 
-            Arguments:
+        options_set_train (set): set of characters of the column from train set. Contains empty string if any train entry is exhausted
+        options_set (set): set of all characters of the column, test set is included
+        optional (bool): if set to ``True`` then some entry is exhausted and thus character should be optional
 
-            options(list): list formed from ``data_entries`` iterators
+        Returns:
 
-            Returns:
+        (str): regex capturing all options
 
-            (RegexPart): RegexPart object representing fragment matching all ``options``. None if no option provided.
+        """
 
-            """
+        # 4 kroki budowania, najpierw testujemy same znaki, jak matchuje tez na testowym to git, jak nie to ogolne, jak nie to znaki {0,1}, jak nie to ogolne {0,1}
 
+        quantifier = '{0,1}' if optional else ''
+        chars_train = options_set_train.difference({''})
 
-            # 4 kroki budowania, najpierw testujemy same znaki, jak matchuje tez na testowym to git, jak nie to ogolne, jak nie to znaki {0,1}, jak nie to ogolne {0,1}
-            if any(options):
-                
-                # it has to be chacked whether one of generators didn't finish, in this case this character should be optional
-                if '' in options:
-                    optional = True
-                else:
-                    optional = False
+        # attempt 1 -> only letters present in train set
+        if len(options_set_train) < 3 and chars_train and options_set.issubset(chars_train):
+            if len(options_set_train) > 1:
+                char_letters = f"[{escape_class(''.join(sorted(options_set_train)))}]"
+            else:
+                char_letters = escape_literal(list(options_set_train)[0])
+            return char_letters + quantifier
+
+        # attempt 2 -> general regex characters
+        flags_train = 0
+        for char in chars_train:
+            code = ord(char)
+            if code < 128:
+                flags_train |= CHAR_FLAGS[code]
+
+        char_general = ''
+        counter = 0
+        mask = 0
+
+        if flags_train & LETTER:
+            counter += 1
+            mask |= WORD
+            char_general += r'\w' # captures also digits
+        elif flags_train & DIGIT:
+            counter += 1
+            mask |= DIGIT
+            char_general += r'\d' # only digits if `word characters` not present
+        if flags_train & WHITESPACE:
+            counter += 1
+            mask |= WHITESPACE
+            char_general += r'\s'
+        difference = self.set_punctuation.intersection(options_set_train)
+        if difference:
+            counter += len(difference)
+            char_general += escape_class(''.join(sorted(difference)))
+
+        if counter > 1:
+            char_general = f'[{char_general}]'
+
+        if char_general and class_covers(options_set, mask, difference, char_general):
+            return char_general + quantifier
+
+        # attempt 3 -> any character or none
+        char_any = '.' if '\n' not in options_set else r'[\s\S]'
+        if optional:
+            char_any += '?'
+        return char_any
+
+    def find_correct_block_code(self, codes_train, codes, optional, n_options):
+        r"""
+        Version of ``find_correct_block_char`` for columns of ``bytes`` strings. Decision is made on byte values, memoized in ``byte_block_cache``,
+        and translated to characters only for emitted ``RegexPart``.
 
-                if self.train_part_end_index:
-                    options_set_train = set(options[:self.train_part_end_index])
-                else:
-                    options_set_train = set(options)
+        Arguments:
 
-                percentage = len(options_set_train)/len(options)
-                options_string = ''.join(options) # test set is included
+        codes_train (set): set of byte values of the column from train set. Contains empty string if any train entry is exhausted
+        codes (set): set of all byte values of the column, test set is included
+        optional (bool): if set to ``True`` then some entry is exhausted and thus character should be optional
+        n_options (int): number of entries forming the column
 
-                # attempt 1 -> only letters present in train set
-                if len(options_set_train) < 3:
-                    if len(options_set_train) > 1:
-                        char_letters = f"[{''.join(options_set_train)}]".replace('-','\\-').replace('(','\\(').replace(')','\\)').replace('{','\\{').replace('[','\\[')
-                    else:
-                        char_letters = list(options_set_train)[0]
-                
-                    if optional:
-                        char_letters += '{0,1}'
-                        if len(re.findall(char_letters, options_string)) -1 == len(options_string): # everything found
-                            return RegexPart(char_letters, options_set_train, percentage)
+        Returns:
 
-                    else:
-                        if len(re.findall(char_letters, options_string)) == len(options_string): # everything found
-                            return RegexPart(char_letters, options_set_train, percentage)
+        (RegexPart): RegexPart object representing fragment matching all options.
+        """
+        codes_train_present = codes_train.difference({''})
+        signature = (frozenset(codes_train), frozenset(codes.difference(codes_train_present)), optional)
+        char = self.byte_block_cache.get(signature)
+        if char is None:
+            char = self.find_block_code(codes_train, codes, optional)
+            self.byte_block_cache.put(signature, char)
+        return RegexPart(char, {BYTE_CHARS[code] if code != '' else '' for code in codes_train}, len(codes_train)/n_options)
+
+    def find_block_code(self, codes_train, codes, optional):
+        r"""
+        Decides regex capturing one column of byte values, the same way as ``find_block_char`` does for characters.
+        Classes are chosen from ``CHAR_FLAGS`` only, bytes patterns do not capture values above 127 by ``\w``, ``\d`` nor ``\s``.
 
-                # attempt 2 -> general regex characters
-                char_general = ''
-                counter = 0
+        Arguments:
 
-                if self.set_letters.intersection(options_set_train):
-                    counter += 1
-                    char_general += r'\w' # captures also digits
-                elif self.set_digits.intersection(options_set_train):
-                    counter += 1
-                    char_general += r'\d' # only digits if `word characters` not present
-                if self.set_whitespace.intersection(options_set_train):
-                    counter += 1
-                    char_general += r'\s'
-                if self.set_punctuation.intersection(options_set_train):
-                    counter += 1
-                    difference = self.set_punctuation.intersection(options_set_train)
-                    char_general += ''.join(difference).replace('-','\\-').replace('(','\\(').replace(')','\\)').replace('{','\\{').replace('[','\\[')
+        codes_train (set): set of byte values of the column from train set. Contains empty string if any train entry is exhausted
+        codes (set): set of all byte values of the column, test set is included
+        optional (bool): if set to ``True`` then some entry is exhausted and thus character should be optional
 
-                if counter > 1:
-                    char_general = f'[{char_general}]'
-                
-                try:
-                    if optional:
-                        char_general += "{0,1}"
-                        if len(re.findall(char_general, options_string)) -1 == len(options_string): # everything found
-                            return RegexPart(char_general, options_set_train, percentage)
-                    else:
-                        if len(re.findall(char_general, options_string)) == len(options_string): # everything found
-                            return RegexPart(char_general, options_set_train, percentage)
-                except Exception as ex:
-                    print(ex)
-                    input(char_general)
-
-
-                # attempt 3 -> any character or none
-                if optional:
-                    char_any = '.?'
-                    if len(re.findall(char_any, options_string)) -1 == len(options_string): # everything found
-                        return RegexPart(char_any, options_set_train, percentage)
-                else:
-                    char_any = '.'
-                    if len(re.findall(char_any, options_string)) == len(options_string): # everything found
-                        return RegexPart(char_any, options_set_train, percentage)
+        Returns:
+
+        (str): regex capturing all options
+        """
+        quantifier = '{0,1}' if optional else ''
+        present_train = codes_train.difference({''})
+
+        # attempt 1 -> only values present in train set
+        if len(codes_train) < 3 and present_train and codes.issubset(present_train):
+            chars = ''.join(BYTE_CHARS[code] for code in sorted(present_train))
+            return (f"[{escape_class(chars)}]" if len(codes_train) > 1 else escape_literal(chars)) + quantifier
+
+        # attempt 2 -> general regex characters
+        flags_train = 0
+        for code in present_train:
+            if code < 128:
+                flags_train |= CHAR_FLAGS[code]
+
+        char_general = ''
+        counter = 0
+        mask = 0
+
+        if flags_train & LETTER:
+            counter += 1
+            mask |= WORD
+            char_general += r'\w' # captures also digits
+        elif flags_train & DIGIT:
+            counter += 1
+            mask |= DIGIT
+            char_general += r'\d' # only digits if `word characters` not present
+        if flags_train & WHITESPACE:
+            counter += 1
+            mask |= WHITESPACE
+            char_general += r'\s'
+        difference = PUNCTUATION_CODES.intersection(present_train)
+        if difference:
+            counter += len(difference)
+            char_general += escape_class(''.join(BYTE_CHARS[code] for code in sorted(difference)))
+
+        if counter > 1:
+            char_general = f'[{char_general}]'
+
+        if char_general and all(code < 128 and (CHAR_FLAGS[code] & mask or code in difference) for code in codes):
+            return char_general + quantifier
+
+        # attempt 3 -> any character or none
+        char_any = '.' if 10 not in codes else r'[\s\S]'
+        if optional:
+            char_any += '?'
+        return char_any
+
+    def column_block(self, options):
+        r"""
+        Generates ``RegexPart`` for column of characters.
 
+        Arguments:
 
-                raise Exception(f'Something went very wrong for set: {str(options)}')
+        options(list): list of characters of one column, one for every entry of ``data_entries``
 
-            else:
+        Returns:
+
+        (RegexPart): RegexPart object representing fragment matching all ``options``. None if no option provided.
+
+        """
+        if self.as_bytes:
+            # byte values are decided as integers, 0 is a valid value so exhausted entries are found by ``''``
+            codes = set(options)
+            optional = '' in codes
+            if not codes.difference({''}):
                 return None
-            
+            codes_train = set(options[:self.train_part_end_index]) if self.train_part_end_index else codes
+            return self.find_correct_block_code(codes_train, codes.difference({''}), optional, len(options))
+        if not any(options):
+            return None
+
+        # it has to be chacked whether one of generators didn't finish, in this case this character should be optional
+        optional = '' in options
+
+        if self.train_part_end_index:
+            options_set_train = set(options[:self.train_part_end_index])
+        else:
+            options_set_train = set(options)
+
+        return self.find_correct_block_char(options_set_train, set(options).difference({''}), optional, len(options))
+
+    def generate_next_part(self, left = True, mid = False, right = True):
+        r"""
+        Generates next RegexParts for specified parts of regex
+
+        Arguments:
+
+        left (bool, optional): if set to ``True``, ``left_gen`` of all ``data_entries`` will be used.
+        mid (bool, optional): if set to ``True``, ``mid_gen`` of all ``data_entries`` will be used.
+        right (bool, optional): if set to ``True``, ``right_gen`` of all ``data_entries`` will be used.
+
+        Returns
+
+        (tuple): (left_block, mid_block, right_block) - ``RegexPart`` objects.
         
+
+        """
+
         generated_parts = []
 
         left_list = []
@@ -351,15 +1053,15 @@ class RegexGenerator:
 
 
         if left:
-            left_block = find_correct_block_char(left_list)     
+            left_block = self.column_block(left_list)
         else:
             left_block = None
         if mid:
-            mid_block = find_correct_block_char(mid_list)
+            mid_block = self.column_block(mid_list)
         else:
             mid_block = None
         if right:
-            right_block = find_correct_block_char(right_list)
+            right_block = self.column_block(right_list)
         else:
             right_block = None
 
@@ -368,7 +1070,7 @@ class RegexGenerator:
 
     def fix_escaped(self, string):
 
-        escaped = ['[','(','{','-','"','|','^']
+        escaped = ['\\',']','[','(','{','-','"','|','^'] # backslash goes first, so escapes added later are kept
         for char in escaped:
             string = string.replace(char, f'\\{char}')
         return string
@@ -379,7 +1081,7 @@ class RegexGenerator:
         digits_set = set(string.digits)
         whitespace_set = set(string.whitespace)
         punct_set = set(string.punctuation)
-        string_set = set(''.join(strings))
+        string_set = set(''.join(s.decode('latin-1') if isinstance(s, bytes) else s for s in strings))
         options = []
         if len(letters_set.intersection(string_set)) > 0:
             options.append('\w')
@@ -388,70 +1090,742 @@ class RegexGenerator:
         if len(whitespace_set.intersection(string_set)) > 0:
             options.extend(string_set.intersection(whitespace_set))
         if len(punct_set.intersection(string_set)) > 0:
-            options.extend(string_set.intersection(punct_set))
+            options.extend(self.fix_escaped(char) for char in string_set.intersection(punct_set))
     
-        regexp = f"[{self.fix_escaped(''.join(options))}]{quantifier}"
+        regexp = f"[{''.join(options)}]{quantifier}"
         if with_brackets:
             regexp = f"({regexp})"
         return regexp
 
-    def evaluate(self, ignore_mid = True):
+    def build_mid(self, fragments, segments = True):
+        r"""
+        Builds mid regex in single pass over distinct ``fragments``, measuring their lengths and classes of their characters together.
+        If all fragments consist of the same sequence of segments (runs of digits, runs of ASCII letters, runs of any other single character)
+        then every segment gets its own block, e.g. ``[A-Za-z]{2}\d{1,2}/\d{1,2}``. Otherwise whole fragment is captured by single class, e.g. ``[\w/]{2,13}``.
+
+        Arguments:
+
+        fragments (list): searched fragments, strings or ``bytes``
+        segments (bool, optional): if set to ``False`` then single class is always used. (default: ``True``)
+
+        Returns:
+
+        (str): mid regex
+        """
+        def quantifier(minimum, maximum):
+            if minimum == maximum:
+                return '' if minimum == 1 else f'{{{minimum}}}'
+            return f'{{{minimum},{maximum}}}'
+
+        fragments = list(dict.fromkeys(fragment.decode('latin-1') if isinstance(fragment, bytes) else fragment for fragment in fragments))
+        if not fragments:
+            return ''
+
+        shape, bounds = None, None # sequence of segment kinds shared by all fragments and (min, max) length of every segment
+        kinds = set()
+        for fragment in fragments:
+            translated = fragment.translate(SEGMENT_KINDS)
+            kinds.update(translated)
+            if shape is not None and bounds is None:
+                continue
+            runs = [(match.group(1), match.end() - match.start()) for match in SEGMENT_RUNS.finditer(translated)]
+            if shape is None:
+                shape, bounds = [key for key, length in runs], [[length, length] for key, length in runs]
+            elif shape == [key for key, length in runs]:
+                for bound, (key, length) in zip(bounds, runs):
+                    bound[0], bound[1] = min(bound[0], length), max(bound[1], length)
+            else:
+                bounds = None
+
+        if segments and bounds is not None and shape:
+            blocks = {'0': r'\d', 'a': '[A-Za-z]'}
+            return ''.join((blocks[key] if key in blocks else escape_literal(key)) + quantifier(*bound) for key, bound in zip(shape, bounds))
+
+        lengths = [len(fragment) for fragment in fragments]
+        if max(lengths) == 0:
+            return '' # only empty selections, e.g. (2, 2) with ``inclusive_end=False``
+        members = []
+        if 'a' in kinds:
+            members.append(r'\w') # captures also digits
+        elif '0' in kinds:
+            members.append(r'\d')
+        others = sorted(key for key in kinds if key not in 'a0' and not ('a' in kinds and re.fullmatch(r'\w', key)))
+        if any(key in self.set_whitespace for key in others):
+            members.append(r'\s')
+        literals = [key for key in others if key not in self.set_whitespace]
+        if not members and not literals:
+            return ''
+        if not members and len(literals) == 1:
+            char_class = escape_literal(literals[0])
+        else:
+            members.extend(escape_class(key) for key in literals)
+            char_class = f"[{''.join(members)}]" if len(members) > 1 else ''.join(members)
+        return char_class + quantifier(min(lengths), max(lengths))
+
+    def check_string(self, regex, string, spans):
+        r"""
+        Checks whether ``regex`` applied to ``string`` finds exactly the selected ``spans``. String is scanned once and check stops on first unexpected match.
+
+        Arguments:
+
+        regex (re.Pattern): compiled regex with part of interest in 1st group
+        string (str): source string
+        spans (set): set of spans selected in ``string``
+
+        Returns:
+
+        (bool): True if string is matched correctly
+        """
+        if self.stats is not None:
+            self.stats.count('finditer')
+            self.stats.count('characters_scanned', len(string))
+        if self.budget is not None:
+            self.budget.check()
+        return check_spans(regex, string, spans)
+
+    def evaluate(self, ignore_mid = True, len_left = None, len_right = None):
         r"""
-        Evaluates current regexp for all data including test and return True or False whether all matches are correct or not
+        Evaluates current regexp for all data including test and return True or False whether all matches are correct or not.
+        Every source string is scanned once no matter how many selections it has.
         
         Arguments:
 
         ignore_mid (bool, optional): Whether to ignore building mid regex. (default: True)
+        len_left (int, optional): if set - only ``len_left`` blocks of left neighbourhood are used. (default: ``None``)
+        len_right (int, optional): if set - only ``len_right`` blocks of right neighbourhood are used. (default: ``None``)
         """
-        regex = self.compile_from_builders(ignore_mid=ignore_mid)
-        for index, entry in enumerate(self.data_entries):
+        return self.evaluate_pattern(self.compile_from_builders(ignore_mid=ignore_mid, len_left=len_left, len_right=len_right))
 
-            searched = [match for match in re.finditer(regex, entry.string)]
-            spans_found = [] 
+    def evaluate_pattern(self, pattern):
+        r"""
+        Evaluates ``pattern`` like ``evaluate`` evaluates regex compiled from builders
 
-            for s in searched:
-                try:
-                    spans_found.append(s.span(1))
-                except:
-                    return False ## group 1 should always exist and match at least empty string
+        Arguments:
+
+        pattern (str): regex with part of interest in 1st group
+
+        Returns:
+
+        (bool): True if all strings are matched correctly
+        """
+        regex = self.compile_pattern(pattern)
+        for string, spans in self.spans_index.items():
+            if not self.check_string(regex, string, spans):
+                return False
+        return True
+
+    def evaluate_incremental(self, ignore_mid = True, len_left = None, len_right = None):
+        r"""
+        Evaluates current regexp like ``evaluate`` but reuses results of previous calls. Strings that failed recently are rechecked first
+        and evaluation stops on the first failing one. Strings that passed are only rechecked once all previously failing strings pass,
+        so result is always the same as the one of ``evaluate``.
+
+        Arguments:
 
-            if (entry.selection in spans_found) and (len(set(spans_found).difference(set(self.spans_list))) == 0):
+        ignore_mid (bool, optional): Whether to ignore building mid regex. (default: True)
+        len_left (int, optional): if set - only ``len_left`` blocks of left neighbourhood are used. (default: ``None``)
+        len_right (int, optional): if set - only ``len_right`` blocks of right neighbourhood are used. (default: ``None``)
+        """
+        regex = self.compile_pattern(self.compile_from_builders(ignore_mid=ignore_mid, len_left=len_left, len_right=len_right))
+
+        # strings that failed before are the most likely to fail again
+        for position, string in enumerate(self.failed_strings):
+            if not self.check_string(regex, string, self.spans_index[string]):
+                if position:
+                    self.failed_strings.insert(0, self.failed_strings.pop(position))
+                return False
+
+        # all of them pass now, so the rest has to be confirmed
+        failed = set(self.failed_strings)
+        for string, spans in self.spans_index.items():
+            if string in failed:
                 continue
-            else:
+            if not self.check_string(regex, string, spans):
+                self.failed_strings.insert(0, string)
                 return False
+
+        self.failed_strings = []
         return True
 
     def check_mid_reg_correct(self, ignore_mid = False):
-        
+        r"""
+        Checks whether mid regex captures every searched fragment as a whole
+
+        Arguments:
+
+        ignore_mid (bool, optional): if set to ``True`` then current ``mid_regex`` is checked instead of one compiled from ``mid_regex_builder``. (default: ``False``)
+        """
         self.compile_from_builders(ignore_mid=ignore_mid)
+        mid = self.compile_pattern(self.mid_regex)
         
         for entry in self.data_entries:
-            match = re.match(self.mid_regex, entry.search_fragment)
-            match_full = re.search(self.mid_regex, entry.search_fragment)
-            if match.group(0) != entry.search_fragment:
+            if mid.fullmatch(entry.search_fragment) is None:
                 return False
 
         return True
         
 
-    def evolve(self, ignore_mid = True, mid = "", max_iter = -1, min_iter = -1, check_mid = True, mid_classic = True):
+    def search_context(self, generate_next_part, evaluate, ignore_mid = True):
+        r"""
+        Finds short context lengths for which regex passes evaluation. Number of blocks on both sides grows geometrically until regex passes
+        and then left and right lengths are bisected independently, so number of evaluations is logarithmic in context length.
+        Passing is not monotonic, long context may swallow next selection, so whenever galloping jumps from failing length to another failing one
+        lengths skipped between them are scanned linearly. None is returned only if linear search would return it too.
+
+        Arguments:
+
+        generate_next_part (callable): function generating next ``RegexPart`` objects, like ``generate_next_part``
+        evaluate (callable): function evaluating regex, like ``evaluate``
+        ignore_mid (bool, optional): Whether to ignore building mid regex. (default: True)
+
+        Returns:
+
+        (tuple): (len_left, len_right) - numbers of blocks on each side or None if full neighbourhoods do not pass
+        """
+        do_left, do_right = True, True
+
+        def grow(length):
+            nonlocal do_left, do_right
+            while (do_left and len(self.left_regex_builder) < length) or (do_right and len(self.right_regex_builder) < length):
+                step_left = do_left and len(self.left_regex_builder) < length
+                step_right = do_right and len(self.right_regex_builder) < length
+                left_block, mid_block, right_block = generate_next_part(step_left, False, step_right)
+                if step_left:
+                    if left_block:
+                        self.left_regex_builder.append(left_block)
+                    else:
+                        do_left = False
+                if step_right:
+                    if right_block:
+                        self.right_regex_builder.append(right_block)
+                    else:
+                        do_right = False
+
+        def passes(len_left, len_right):
+            return evaluate(ignore_mid=ignore_mid, len_left=len_left, len_right=len_right)
+
+        # galloping until regex passes
+        length, previous = 1, 0
+        tested = set()
+        while True:
+            grow(length)
+            len_left, len_right = min(length, len(self.left_regex_builder)), min(length, len(self.right_regex_builder))
+            tested.add((len_left, len_right))
+            if passes(len_left, len_right):
+                break
+            # linear scan of lengths skipped since previous failing one, the same lengths as ``evolve`` with ``search='linear'`` checks
+            found = None
+            for skipped in range(previous + 1, length):
+                lengths = (min(skipped, len_left), min(skipped, len_right))
+                if lengths not in tested:
+                    tested.add(lengths)
+                    if passes(*lengths):
+                        found = lengths
+                        break
+            if found is not None:
+                len_left, len_right = found
+                break
+            if not do_left and not do_right and len_left == len(self.left_regex_builder) and len_right == len(self.right_regex_builder):
+                return None
+            previous, length = length, length * 2
+
+        # bisection of each side, upper bound is always a passing length
+        low = 0
+        while low < len_left:
+            middle = (low + len_left) // 2
+            if passes(middle, len_right):
+                len_left = middle
+            else:
+                low = middle + 1
+
+        low = 0
+        while low < len_right:
+            middle = (low + len_right) // 2
+            if passes(len_left, middle):
+                len_right = middle
+            else:
+                low = middle + 1
+
+        return len_left, len_right
+
+    def clear_builders(self):
+        r"""Forgets builders and regex parts, so that next ``evolve`` trains from scratch instead of resuming"""
+        self.left_regex_builder = []
+        self.mid_regex_builder = []
+        self.right_regex_builder = []
+        self.left_regex = ""
+        self.mid_regex = ""
+        self.right_regex = ""
+
+    def warm_start(self):
+        r"""
+        Prepares builders for resumed training. Every existing column is checked against entries appended since builders were generated
+        (all entries if their order is unknown) and only columns that do not capture new characters are generated again from all entries.
+        Cursors of all entries are moved past existing columns, so next generated blocks extend builders. New source strings are
+        evaluated first by ``evaluate_incremental``.
+
+        Returns:
+
+        (int): number of regenerated columns
+        """
+        new_entries = self.data_entries[self.trained_entries:]
+        regenerated = 0
+        if new_entries:
+            for side, builder in (('left', self.left_regex_builder), ('mid', self.mid_regex_builder), ('right', self.right_regex_builder)):
+                for index, part in enumerate(builder):
+                    block = self.compile_pattern(part.char)
+                    chars = {entry.column_char(side, index) for entry in new_entries}
+                    if self.as_bytes:
+                        chars = {bytes([char]) if char != '' else b'' for char in chars}
+                    if all(block.fullmatch(char) for char in chars):
+                        continue
+                    part = self.column_block([entry.column_char(side, index) for entry in self.data_entries])
+                    if part is None: # column is past every neighbourhood, possible only if builders were loaded without their data
+                        del builder[index:]
+                        break
+                    builder[index] = part
+                    regenerated += 1
+
+            new_strings = list(dict.fromkeys(entry.string for entry in new_entries))
+            seen = set(new_strings)
+            self.failed_strings = new_strings + [string for string in self.failed_strings if string not in seen]
+
+        for entry in self.data_entries:
+            entry.seek(len(self.left_regex_builder), len(self.mid_regex_builder), len(self.right_regex_builder))
+        self.trained_entries = len(self.data_entries)
+        return regenerated
+
+    def save_state(self, path, with_data = True):
+        r"""
+        Saves trained state to gzipped JSON file: builders, regex parts, split index, cached block decisions and optionally data entries
+
+        Arguments:
+
+        path (str): path of file
+        with_data (bool, optional): if set to ``True`` then source strings and selections are saved too, so training can be resumed without them. (default: ``True``)
+        """
+        def parts(builder):
+            return [[part.char, sorted(part.options), part.percentage] for part in builder]
+
+        state = {
+            'version': 1,
+            'builders': {'left': parts(self.left_regex_builder), 'mid': parts(self.mid_regex_builder), 'right': parts(self.right_regex_builder)},
+            'regex': [self.left_regex, self.mid_regex, self.right_regex],
+            'train_part_end_index': self.train_part_end_index,
+            'block_cache': [[sorted(train), sorted(rest), optional, char] for (train, rest, optional), char in self.block_cache.items()],
+        }
+        if with_data:
+            strings = list(dict.fromkeys(entry.string for entry in self.expand_entries()))
+            positions = {string: index for index, string in enumerate(strings)}
+            state['strings'] = [string.decode('latin-1') if isinstance(string, bytes) else string for string in strings]
+            state['entries'] = [[positions[entry.string], entry.selection[0], entry.selection[1], entry.max_nbh] for entry in self.data_entries]
+            state['duplicates'] = [[index, [[positions[entry.string], entry.selection[0], entry.selection[1], entry.max_nbh] for entry in entries]] for index, entries in self.duplicates.items()]
+            state['trained_entries'] = self.trained_entries
+            state['failed_strings'] = [positions[string] for string in self.failed_strings if string in positions]
+
+        with gzip.open(path, 'wt', encoding='utf-8') as f:
+            json.dump(state, f, separators=(',', ':'))
+
+    def load_state(self, path):
+        r"""
+        Loads state saved by ``save_state``. Data entries are restored only if they were saved, otherwise currently parsed ones are kept
+        and treated as new ones by ``warm_start``.
+
+        Arguments:
+
+        path (str): path of file
+        """
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            state = json.load(f)
+        if state.get('version') != 1:
+            raise Exception(f"Unsupported state version: {state.get('version')}")
+
+        def parts(items):
+            return [RegexPart(char, set(options), percentage) for char, options, percentage in items]
+
+        self.left_regex_builder = parts(state['builders']['left'])
+        self.mid_regex_builder = parts(state['builders']['mid'])
+        self.right_regex_builder = parts(state['builders']['right'])
+        self.left_regex, self.mid_regex, self.right_regex = state['regex']
+        for train, rest, optional, char in state['block_cache']:
+            self.block_cache.put((frozenset(train), frozenset(rest), optional), char)
+
+        if 'entries' in state:
+            strings = state['strings']
+            if self.as_bytes:
+                strings = [string.encode('latin-1') for string in strings]
+            self.data_entries = []
+            for index, start, end, max_nbh in state['entries']:
+                self.data_entries.append(Data_Entry(strings[index], (start, end), max_nbh))
+                self.data_entries[-1].initialize_generators()
+            self.duplicates = {index: [Data_Entry(strings[position], (start, end), max_nbh) for position, start, end, max_nbh in entries] for index, entries in state['duplicates']}
+            self.train_part_end_index = state['train_part_end_index']
+            self.trained_entries = state['trained_entries']
+            self.failed_strings = [strings[index] for index in state['failed_strings']]
+            self.save_spans_data()
+            self.save_selections_data()
+            for entry in self.data_entries[:self.trained_entries]:
+                entry.seek(len(self.left_regex_builder), len(self.mid_regex_builder), len(self.right_regex_builder))
+        else:
+            self.trained_entries = 0
+
+    def negative_samples(self):
+        r"""Returns source strings with all selected fragments cut out, text that contains contexts but must not be matched"""
+        samples = []
+        for string, spans in self.spans_index.items():
+            pieces, position = [], 0
+            for start, end in sorted(spans):
+                pieces.append(string[position:start])
+                position = max(position, end)
+            pieces.append(string[position:])
+            samples.append(string[:0].join(pieces))
+        return samples
+
+    def optimize_cost(self, ignore_mid = True, len_left = None, len_right = None, negative_texts = None, sample_size = 50, repeat = 3):
+        r"""
+        Chooses the cheapest regex among equivalents of the current one that still pass ``evaluate``. Candidates combine mid regexes
+        (current one and tighter classes built from searched fragments) with context lengths (current ones, the shortest passing ones and
+        the shortest ones whose outermost left block is a literal). Every candidate is timed on positive and negative samples and checked
+        for superlinear backtracking growth, see ``cost.score_pattern``. Report of all candidates is stored in ``cost_report``.
+
+        Arguments:
+
+        ignore_mid (bool, optional): Whether mid regex was given instead of built from ``mid_regex_builder``. (default: True)
+        len_left (int, optional): number of left blocks of current regex, all if not set. (default: ``None``)
+        len_right (int, optional): number of right blocks of current regex, all if not set. (default: ``None``)
+        negative_texts (list, optional): strings that must not be matched, source strings with selections cut out if not set. (default: ``None``)
+        sample_size (int, optional): maximal number of positive and of negative strings used for timing. (default: 50)
+        repeat (int, optional): number of timed runs of every candidate. (default: 3)
+
+        Returns:
+
+        (str): Regex string of the cheapest candidate that is not pathological, or the cheapest one if all are
+        """
+        from cost import score_pattern, is_literal
+
+        len_left = len(self.left_regex_builder) if len_left is None else len_left
+        len_right = len(self.right_regex_builder) if len_right is None else len_right
+        self.compile_from_builders(ignore_mid)
+        mids = [self.mid_regex]
+        if self.all_searched_fragments and all(self.all_searched_fragments):
+            for quantifier in ['+', '+?']:
+                tighter = self.prepare_mid(self.all_searched_fragments, quantifier=quantifier, with_brackets=False)
+                if tighter in mids:
+                    continue
+                try:
+                    self.compile_pattern(tighter)
+                except re.error:
+                    continue # candidate that does not compile is dropped, current mid stays available
+                mids.append(tighter)
+
+        def passes(len_left, len_right):
+            return self.evaluate(ignore_mid=True, len_left=len_left, len_right=len_right)
+
+        def shortest(limit, passes_with):
+            low = 0
+            while low < limit:
+                middle = (low + limit) // 2
+                if passes_with(middle):
+                    limit = middle
+                else:
+                    low = middle + 1
+            return limit
+
+        candidates = []
+        for mid in mids:
+            self.mid_regex = mid
+            if not passes(len_left, len_right):
+                continue
+            lengths = [(len_left, len_right)]
+            short_left = shortest(len_left, lambda length: passes(length, len_right))
+            short_right = shortest(len_right, lambda length: passes(short_left, length))
+            lengths.append((short_left, short_right))
+            # literal outermost block lets regex engine search for literal prefix
+            for length in range(max(short_left, 1), len(self.left_regex_builder) + 1):
+                if is_literal(self.left_regex_builder[length - 1].char) and passes(length, short_right):
+                    lengths.append((length, short_right))
+                    break
+            for lengths_pair in dict.fromkeys(lengths):
+                candidates.append((mid, lengths_pair, self.compile_from_builders(True, len_left=lengths_pair[0], len_right=lengths_pair[1])))
+
+        if not candidates:
+            self.compile_from_builders(ignore_mid, len_left=len_left, len_right=len_right)
+            return None
+
+        positive = list(islice(self.spans_index, sample_size))
+        negative = list(negative_texts) if negative_texts is not None else self.negative_samples()
+        negative = negative[:sample_size]
+
+        scores = []
+        for mid, lengths, pattern in candidates:
+            score = score_pattern(pattern, positive, negative, repeat)
+            score.update({'len_left': lengths[0], 'len_right': lengths[1]})
+            scores.append(score)
+        best = min(range(len(scores)), key=lambda i: (scores[i]['pathological'], scores[i]['cost_per_kb'], len(scores[i]['regex'])))
+
+        self.cost_report = dict(scores[best], candidates=scores)
+        mid, lengths, pattern = candidates[best]
+        self.mid_regex = mid
+        return self.compile_from_builders(True, len_left=lengths[0], len_right=lengths[1])
+
+    def compact(self, ignore_mid = True, len_left = None, len_right = None, flexible = 0, repeat = 3):
+        r"""
+        Compiles builders merging runs of equivalent blocks into quantified ones, see ``compact_parts``. Result is verified with ``evaluate_pattern``,
+        if flexible ranges do not pass then exact ones are tried and if they do not pass either the regex is compiled as usual.
+        Lengths and scanning times of source strings before and after compaction are stored in ``compaction_report``.
+
+        Arguments:
+
+        ignore_mid (bool, optional): if set to ``True`` then ``mid_regex`` is used as it is, otherwise ``mid_regex_builder`` is compacted. (default: ``True``)
+        len_left (int, optional): if set - only ``len_left`` blocks closest to part of interest will be compiled. (default: ``None``)
+        len_right (int, optional): if set - only ``len_right`` blocks will be compiled. (default: ``None``)
+        flexible (int, optional): bounds of merged runs are widened by that many repetitions. (default: 0)
+        repeat (int, optional): number of timed runs of every regex. (default: 3)
+
+        Returns:
+
+        (str): string regex
+        """
+        from cost import scan_time
+
+        original = self.compile_from_builders(ignore_mid, len_left=len_left, len_right=len_right)
+        mid = self.mid_regex
+        if not ignore_mid:
+            mid = compact_parts(self.mid_regex_builder)
+
+        pattern, used = original, None
+        for width in dict.fromkeys([flexible, 0]):
+            left = compact_parts(reversed(self.left_regex_builder[:len_left]), width)
+            right = compact_parts(self.right_regex_builder[:len_right], width)
+            candidate = f'{left}({mid}){right}'
+            if candidate == original or self.evaluate_pattern(candidate):
+                pattern, used = candidate, width
+                self.left_regex, self.mid_regex, self.right_regex = left, mid, right
+                self.diagnostics = MatchDiagnostics(self, left, mid, right)
+                break
+
+        strings = list(self.spans_index)
+        self.compaction_report = {
+            'regex': pattern,
+            'flexible': used,
+            'original_length': len(original),
+            'compacted_length': len(pattern),
+            'original_seconds': scan_time(self.compile_pattern(original), strings, repeat),
+            'compacted_seconds': scan_time(self.compile_pattern(pattern), strings, repeat),
+        }
+        return pattern
+
+    def precision_recall(self, pattern, max_characters = None):
+        r"""
+        Measures precision and recall of ``pattern`` separately on train and test entries, split by ``train_part_end_index``.
+        Spans selected in entries of the other split are neither correct nor wrong matches. Duplicates belong to split of their representative.
+
+        Arguments:
+
+        pattern (str): regex with part of interest in 1st group
+        max_characters (int, optional): if set - only entries of the first source strings of every split, which together have at least
+            ``max_characters`` characters, are measured. (default: ``None``)
+
+        Returns:
+
+        (dict): dictionary mapping ``'train'`` and ``'test'`` to dictionaries with ``precision``, ``recall`` and ``entries``, measures are ``None`` if split is empty
+        """
+        regex = self.compile_pattern(pattern)
+        split = self.train_part_end_index or len(self.data_entries)
+        parts = {'train': self.expand_entries(0, split), 'test': self.expand_entries(split)}
+        if max_characters is not None:
+            for name, entries in parts.items():
+                strings, total = set(), 0
+                for string in dict.fromkeys(entry.string for entry in entries):
+                    if total >= max_characters:
+                        break
+                    strings.add(string)
+                    total += len(string)
+                parts[name] = [entry for entry in entries if entry.string in strings]
+        owners = {(entry.string, entry.selection): name for name, entries in parts.items() for entry in entries}
+        found = {} # spans found in every scanned string
+
+        result = {}
+        for name, entries in parts.items():
+            expected = {(entry.string, entry.selection) for entry in entries}
+            predicted = set()
+            for string in dict.fromkeys(entry.string for entry in entries):
+                if string not in found:
+                    found[string] = {match.span(1) for match in regex.finditer(string)}
+                predicted.update((string, span) for span in found[string] if owners.get((string, span), name) == name)
+            correct = len(expected & predicted)
+            result[name] = {
+                'precision': (correct / len(predicted) if predicted else 0.0) if entries else None,
+                'recall': correct / len(expected) if entries else None,
+                'entries': len(entries),
+            }
+        return result
+
+    def passing_report(self):
+        r"""Returns result of ``precision_recall`` for regex passing ``evaluate``, which finds exactly the selected spans, so no string is scanned"""
+        split = self.train_part_end_index or len(self.data_entries)
+        weights = self.entry_weights()
+        sizes = {'train': sum(weights[:split]), 'test': sum(weights[split:])}
+        return {name: {'precision': 1.0 if size else None, 'recall': 1.0 if size else None, 'entries': size} for name, size in sizes.items()}
+
+    def best_candidate(self, candidates, ignore_mid = True, limit = 4, max_characters = 1 << 15):
+        r"""
+        Chooses the best of evaluated regexes when training was stopped. The last passing one is the best, otherwise up to ``limit`` most recent
+        distinct candidates are compared by F1 score on train entries of sample of source strings, so that choice takes bounded time
+        after budget runs out. Regex parts are compiled from chosen candidate.
+
+        Arguments:
+
+        candidates (list): tuples (mid_regex, len_left, len_right, passed) recorded by ``budget.TrainingBudget``
+        ignore_mid (bool, optional): Whether mid regex is used as it is if there are no candidates. (default: True)
+        limit (int, optional): maximal number of failing candidates measured. (default: 4)
+        max_characters (int, optional): size of sample of every split failing candidates are measured on, see ``precision_recall``. (default: 32768)
+
+        Returns:
+
+        (tuple): (regex, measures) - string regex, compiled from all builders if there are no candidates, and its ``precision_recall``
+            result, measured on sample for failing candidates, None if there are no candidates
+        """
+        passing = [candidate for candidate in candidates if candidate[3]]
+        if passing:
+            mid, len_left, len_right, passed = passing[-1]
+            self.mid_regex = mid
+            return self.compile_from_builders(True, len_left=len_left, len_right=len_right), self.passing_report()
+
+        best, best_score, best_measures = None, -1.0, None
+        for mid, len_left, len_right, passed in list(dict.fromkeys(candidates))[-limit:]:
+            self.mid_regex = mid
+            measures = self.precision_recall(self.compile_from_builders(True, len_left=len_left, len_right=len_right), max_characters)
+            precision, recall = measures['train']['precision'] or 0.0, measures['train']['recall'] or 0.0
+            score = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+            if score > best_score:
+                best, best_score, best_measures = (mid, len_left, len_right), score, measures
+
+        if best is None:
+            return self.compile_from_builders(ignore_mid), None
+        self.mid_regex = best[0]
+        return self.compile_from_builders(True, len_left=best[1], len_right=best[2]), best_measures
+
+    def evolve_sampled(self, sample_size = 64, max_rounds = 20, max_counterexamples = None, seed = 0, **kwargs):
+        r"""
+        Progressive sampling mode of ``evolve`` for large corpora. Regex is trained on entries of small random sample of source strings and validated
+        on all of them. Entries of strings that failed validation are added to the sample and training resumes from builders of previous round,
+        see ``warm_start``, until regex passes on whole corpus. Numbers of rounds and of entries actually used are stored in ``sampling_report``.
+
+        Arguments:
+
+        sample_size (int, optional): number of source strings in initial sample. (default: 64)
+        max_rounds (int, optional): maximal number of training rounds. (default: 20)
+        max_counterexamples (int, optional): maximal number of failing strings added in one round, ``sample_size`` if not set. (default: ``None``)
+        seed (int, optional): seed of random generator choosing sample. (default: 0)
+        kwargs: keyword arguments of ``evolve``
+
+        Returns:
+
+        (str): Regex string (``extractor.Extractor`` if ``extractor`` is set) passing on whole corpus, regex of the last round if none passed in ``max_rounds`` or None if sample could not be learned
+        """
+        if len(self.data_entries) == 0:
+            raise Exception("Provide data first. Use parse_data method first.")
+        max_counterexamples = max_counterexamples or sample_size
+
+        entries_of = {} # maps source string to all its entries
+        for entry in self.expand_entries():
+            entries_of.setdefault(entry.string, []).append(entry)
+        strings = list(entries_of)
+
+        sample = RegexGenerator(self.pattern_cache.maxsize, self.as_bytes)
+        sample.stats = self.stats
+
+        def take(chosen):
+            for string in chosen:
+                for entry in entries_of[string]:
+                    copy = Data_Entry(entry.string, entry.selection, entry.max_nbh)
+                    copy.initialize_generators()
+                    sample.data_entries.append(copy)
+                sample.spans_index[string] = self.spans_index[string]
+            sample.spans_list = [entry.selection for entry in sample.data_entries]
+            sample.save_selections_data()
+
+        take(random.Random(seed).sample(strings, min(sample_size, len(strings))))
+
+        result, passed, rounds = None, False, 0
+        while rounds < max_rounds:
+            rounds += 1
+            result = sample.evolve(**kwargs)
+            if result is None or not isinstance(result, str) and not hasattr(result, 'pattern'):
+                result = None
+                break
+            regex = self.compile_pattern(result if isinstance(result, str) else result.pattern)
+
+            failed = []
+            for string, spans in self.spans_index.items():
+                if string not in sample.spans_index and not self.check_string(regex, string, spans):
+                    failed.append(string)
+                    if len(failed) == max_counterexamples:
+                        break
+            if not failed:
+                passed = True
+                break
+            take(failed)
+
+        self.left_regex_builder = sample.left_regex_builder
+        self.mid_regex_builder = sample.mid_regex_builder
+        self.right_regex_builder = sample.right_regex_builder
+        self.left_regex, self.mid_regex, self.right_regex = sample.left_regex, sample.mid_regex, sample.right_regex
+        self.trained_entries = 0 # builders come from the sample, all entries are checked against them on next ``evolve``
+        self.sampling_report = {
+            'rounds': rounds,
+            'passed': passed,
+            'entries_used': len(sample.data_entries),
+            'entries_total': sum(len(entries) for entries in entries_of.values()),
+            'strings_used': len(sample.spans_index),
+            'strings_total': len(strings),
+        }
+        return result
+
+    def evolve(self, ignore_mid = True, mid = "", max_iter = -1, min_iter = -1, check_mid = True, mid_classic = True, incremental = True, engine = 'generators', search = 'linear', workers = None, chunk_size = 64, cost_aware = False, negative_texts = None, compact = False, flexible = 0, extractor = False, time_limit = None, max_evaluations = None, cancel = None, mid_histogram = False):
         r"""
         Creates and returns regular expression that matches provided samples. Part of interest is contained in 1st group.
+        If builders are not empty, e.g. after ``parse_data(append=True)`` or ``load_state``, training resumes from them, see ``warm_start``.
 
         Arguments:
 
         ignore_mid (bool, optional): Whether to ignore building mid regex. (default: True)
         mid (str, optional): If ignore mid is set to ``True`` then you can set that value to be exact match for part of interest. 
+        incremental (bool, optional): if set to ``True`` then ``evaluate_incremental`` is used between iterations instead of ``evaluate``. (default: ``True``)
+        engine (str, optional): column engine, ``'generators'`` steps through ``data_entries`` one character at a time, ``'numpy'`` uses ``grid.CharacterGrid``. Both produce the same regex. (default: ``'generators'``)
+        search (str, optional): ``'linear'`` adds one block on each side per iteration, ``'galloping'`` uses ``search_context`` to find short left and right contexts
+            with logarithmic number of evaluations. ``max_iter`` and ``min_iter`` are ignored by ``'galloping'``. (default: ``'linear'``)
+        workers (int, optional): if set - large corpora are evaluated by ``parallel.ParallelEvaluator`` with that many processes. (default: ``None``)
+        chunk_size (int, optional): number of source strings sent to worker as one shard. (default: 64)
+        cost_aware (bool, optional): if set to ``True`` then the cheapest equivalent of found regex is returned, see ``optimize_cost``.
+            Its cost per KB is stored in ``cost_report``. (default: ``False``)
+        negative_texts (list, optional): strings that must not be matched, used for timing if ``cost_aware`` is set. (default: ``None``)
+        compact (bool, optional): if set to ``True`` then runs of equivalent blocks are merged into quantified ones, see ``compact``. (default: ``False``)
+        flexible (int, optional): bounds of merged runs are widened by that many repetitions if regex still passes. (default: 0)
+        extractor (bool, optional): if set to ``True`` then ``extractor.Extractor`` holding compiled regex is returned instead of regex string. (default: ``False``)
+        time_limit (float, optional): if set - training stops after that many seconds and the best regex evaluated so far is returned, see ``best_candidate``.
+            Its precision and recall on train and test entries are stored in ``budget_report``, measured on sample of strings if regex did not pass. (default: ``None``)
+        max_evaluations (int, optional): if set - training stops after that many evaluations, like with ``time_limit``. (default: ``None``)
+        cancel (threading.Event, optional): if set - training stops once event is set from another thread, like with ``time_limit``. (default: ``None``)
+        mid_histogram (bool, optional): if set to ``True`` and ``ignore_mid`` is ``False`` then mid regex is built in single pass by ``build_mid``
+            instead of column by column or by ``prepare_mid``. (default: ``False``)
 
         Returns:
 
-        (str): Regex string
+        (str): Regex string, ``extractor.Extractor`` if ``extractor`` is set
 
         """
 
         if len(self.data_entries) == 0:
             raise Exception("Provide data first. Use parse_data method first.")
 
+        self.compilations = 0
+
+        budget = None
+        if time_limit is not None or max_evaluations is not None or cancel is not None:
+            budget = TrainingBudget(time_limit, max_evaluations, cancel)
+        self.budget = budget
 
         if ignore_mid:
             if mid:
@@ -459,60 +1833,141 @@ class RegexGenerator:
             else:
                 self.mid_regex = ".*?"
 
+        # builders of previous run are resumed, only columns invalidated by new entries are generated again
+        resumed = bool(self.left_regex_builder or self.mid_regex_builder or self.right_regex_builder)
+        if resumed:
+            self.warm_start()
+        else:
+            self.trained_entries = len(self.data_entries)
+
+        if engine == 'generators':
+            generate_next_part = self.generate_next_part
+        elif engine == 'numpy':
+            from grid import CharacterGrid
+            generate_next_part = CharacterGrid(self).generate_next_part
+        else:
+            raise Exception(f'Unknown engine: {engine}')
+
         do_left, do_mid, do_right = True, not ignore_mid, True
+        evaluate = self.evaluate_incremental if incremental else self.evaluate
+
+        evaluator = None
+        if workers:
+            from parallel import ParallelEvaluator
+            evaluator = ParallelEvaluator(self, max_workers=workers, chunk_size=chunk_size)
+            evaluate = evaluator.evaluate
+
+        if budget is not None:
+            generate_next_part = budget.limited_columns(generate_next_part)
+            evaluate = budget.limited_evaluation(evaluate, self)
+
+        if self.stats is not None:
+            evaluate = self.stats.timed_evaluation(evaluate, self)
+            mid_start = time.perf_counter()
+
+        def finish(len_left = None, len_right = None):
+            regex = self.compile_from_builders(ignore_mid, len_left=len_left, len_right=len_right)
+            keep_mid = ignore_mid
+            if cost_aware:
+                built_mid = self.mid_regex
+                regex = self.optimize_cost(ignore_mid, len_left, len_right, negative_texts)
+                if regex is None:
+                    return None
+                len_left, len_right = self.cost_report['len_left'], self.cost_report['len_right']
+                keep_mid = ignore_mid or self.mid_regex != built_mid
+            if compact:
+                regex = self.compact(keep_mid, len_left, len_right, flexible)
+            if budget is not None:
+                # returned regex passed evaluation, also when it was optimized or compacted
+                self.budget_report = dict(self.passing_report(), regex=regex, exhausted=None, evaluations=budget.evaluations, seconds=budget.elapsed())
+            if extractor:
+                from extractor import Extractor
+                return Extractor.from_generator(self, regex)
+            return regex
 
-        # first only mid
-        while do_mid:
-            if mid_classic:
-                left_block, mid_block, right_block = self.generate_next_part(False, do_mid, False)
-                if mid_block:
-                    self.mid_regex_builder.append(mid_block)
-                else:
-                    do_mid = False
-            else:
-                self.mid_regex = self.prepare_mid(self.all_searched_fragments, with_brackets=False)
+        try:
+            # first only mid
+            if do_mid and mid_histogram:
+                self.mid_regex = self.build_mid(self.all_searched_fragments)
                 do_mid = False
                 ignore_mid = True
 
-
-        if check_mid:
-            if not self.check_mid_reg_correct():
-                raise Exception("Bad exception! Mid regex was not found")
-
-            if self.evaluate(ignore_mid=ignore_mid):
-                return self.compile_from_builders(ignore_mid)   
-
-        # then only neighbourhood
-        if max_iter or min_iter:
-            n_iters = 0
-        while (do_left or do_right):
-
-            if max_iter:
-                if n_iters == max_iter:
-                    break
-                n_iters += 1
-                print(n_iters)
-
-            left_block, mid_block, right_block = self.generate_next_part(do_left, do_mid, do_right)
-            if do_left:
-                if left_block:
-                    self.left_regex_builder.append(left_block)
-                else:
-                    do_left = False
-            if do_right:
-                if right_block:
-                    self.right_regex_builder.append(right_block)
+            while do_mid:
+                if mid_classic:
+                    left_block, mid_block, right_block = generate_next_part(False, do_mid, False)
+                    if mid_block:
+                        self.mid_regex_builder.append(mid_block)
+                    else:
+                        do_mid = False
                 else:
-                    do_right = False
+                    self.mid_regex = self.prepare_mid(self.all_searched_fragments, with_brackets=False)
+                    do_mid = False
+                    ignore_mid = True
+
+            if self.stats is not None:
+                self.stats.add_time('mid', time.perf_counter() - mid_start)
+                generate_next_part = self.stats.timed_columns(generate_next_part)
+
+            if check_mid:
+                if not self.check_mid_reg_correct(ignore_mid):
+                    raise Exception("Bad exception! Mid regex was not found")
+
+                if evaluate(ignore_mid=ignore_mid):
+                    return finish()
+
+            # then only neighbourhood
+            if search == 'galloping':
+                lengths = self.search_context(generate_next_part, evaluate, ignore_mid)
+                if lengths is None:
+                    return None
+                return finish(lengths[0], lengths[1])
+            elif search != 'linear':
+                raise Exception(f'Unknown search: {search}')
+
+            if resumed and not check_mid and evaluate(ignore_mid=ignore_mid):
+                return finish()
+
+            if max_iter or min_iter:
+                n_iters = 0
+            while (do_left or do_right):
+
+                if max_iter:
+                    if n_iters == max_iter:
+                        break
+                    n_iters += 1
+                    print(n_iters)
+
+                left_block, mid_block, right_block = generate_next_part(do_left, do_mid, do_right)
+                if do_left:
+                    if left_block:
+                        self.left_regex_builder.append(left_block)
+                    else:
+                        do_left = False
+                if do_right:
+                    if right_block:
+                        self.right_regex_builder.append(right_block)
+                    else:
+                        do_right = False
             
-            if min_iter:
-                if n_iters >= min_iter:
-                    if self.evaluate(ignore_mid=ignore_mid):
-                        return self.compile_from_builders(ignore_mid)
-
-        if max_iter:
-            print("Max iterations number exceeded")
-            return self
-
-        return None
+                if min_iter:
+                    if n_iters >= min_iter:
+                        if evaluate(ignore_mid=ignore_mid):
+                            return finish()
 
+            if max_iter:
+                print("Max iterations number exceeded")
+                return self
+
+            return None
+        except BudgetExceeded as ex:
+            self.budget = None
+            regex, measures = self.best_candidate(budget.candidates, ignore_mid)
+            self.budget_report = dict(measures or {}, regex=regex, exhausted=str(ex), evaluations=budget.evaluations, seconds=budget.elapsed())
+            if extractor:
+                from extractor import Extractor
+                return Extractor.from_generator(self, regex)
+            return regex
+        finally:
+            self.budget = None
+            if evaluator is not None:
+                evaluator.close()
@@ -0,0 +1,135 @@
+import random
+
+from regos import RegexGenerator
+
+def serial_numbers(documents = 30, lines = 4, seed = 0):
+    r"""Documents with lines ``{xx|yy} the serial number of device is: NNNN``, only numbers on ``xx`` lines are selected"""
+    rnd = random.Random(seed)
+    data = []
+    for _ in range(documents):
+        text, selections = '', []
+        for _ in range(lines):
+            tag = rnd.choice(['xx', 'yy'])
+            prefix = f'{tag} the serial number of device is: '
+            if tag == 'xx':
+                selections.append((len(text) + len(prefix), len(text) + len(prefix) + 3))
+            text += prefix + str(rnd.randint(1000, 9999)) + ' ; pad-abcdefghijklmnopqrstuvwxyz0123456789\n'
+        data.append({'string': text, 'selections': selections})
+    return data
+
+def test_galloping_finds_context_skipped_by_non_monotonic_passing():
+    # 32 blocks of left context are too few and 64 blocks of right context swallow the next selection
+    data = serial_numbers()
+    for search in ['linear', 'galloping']:
+        generator = RegexGenerator()
+        generator.parse_data(data, start_end_keys=False)
+        regex = generator.evolve(mid=r'\d+', search=search)
+        assert isinstance(regex, str), search
+        assert generator.evaluate_pattern(regex), search
+
+def test_engines_produce_the_same_regex():
+    from benchmark import generate_corpus, KEYS
+    for kind in ['inventory', 'interface']:
+        corpus = generate_corpus(40, 600, 4, ambiguity=0.3, kind=kind)
+        for options in [{}, {'as_bytes': True}]:
+            regexes = []
+            for engine in ['generators', 'numpy']:
+                generator = RegexGenerator(**options)
+                generator.parse_data(corpus, alternative_keys=KEYS, max_nbh=150)
+                regexes.append(generator.evolve(ignore_mid=False, check_mid=False, engine=engine))
+            assert regexes[0] == regexes[1], (kind, options)
+
+def test_grid_tiles_give_the_same_columns_as_cursors():
+    from benchmark import generate_corpus, KEYS
+    from grid import CharacterGrid
+    corpus = generate_corpus(10, 300, 3, kind='interface')
+    generator = RegexGenerator()
+    generator.parse_data(corpus, alternative_keys=KEYS)
+    grid = CharacterGrid(generator, tile_width=7)
+    while True:
+        expected = generator.generate_next_part(True, True, True)
+        blocks = grid.generate_next_part(True, True, True)
+        assert [block and block.char for block in blocks] == [block and block.char for block in expected]
+        if not any(expected):
+            break
+
+def test_multi_extractor_matches_separate_scans():
+    from benchmark import generate_corpus, FIELD_PATTERNS
+    from extractor import MultiExtractor
+    documents = [document['inputData'] for kind in ['inventory', 'interface'] for document in generate_corpus(20, 500, 3, ambiguity=0.3, kind=kind)]
+    for anchor_ratio in [0, 8]:
+        extractor = MultiExtractor(dict(FIELD_PATTERNS, pair=r'(?:ab|x)(\w+)\d/', empty=r'(x?)'), anchor_ratio=anchor_ratio)
+        for document in documents:
+            for text in [document, document.encode('utf-8')]:
+                assert extractor.scan(text) == extractor.scan_separately(text)
+
+def test_corpus_cache_hit_equals_parsing_of_json_strings(tmp_path):
+    import json
+    import pytest
+    lines = [json.dumps(record) for record in serial_numbers()]
+    state = lambda generator: [(entry.string, entry.selection, entry.left_pos, entry.mid_pos, entry.right_pos) for entry in generator.data_entries]
+    expected = RegexGenerator()
+    expected.parse_data(lines, start_end_keys=False)
+    for _ in range(2): # miss, then hit
+        generator = RegexGenerator()
+        generator.parse_data(iter(lines), start_end_keys=False, cache_dir=str(tmp_path))
+        assert state(generator) == state(expected)
+    with pytest.raises(Exception):
+        RegexGenerator().parse_data(serial_numbers(), start_end_keys=False, cache_dir=str(tmp_path))
+
+def test_budget_stops_training_within_time_limit():
+    import time
+    from benchmark import generate_corpus, KEYS
+    corpus = generate_corpus(600, 4000, 5, ambiguity=0.2)
+    for workers in [None, 2]: # parallel evaluation needs at least 512 source strings
+        generator = RegexGenerator()
+        generator.parse_data(corpus, alternative_keys=KEYS)
+        start = time.perf_counter()
+        regex = generator.evolve(time_limit=0.3, workers=workers)
+        elapsed = time.perf_counter() - start
+        assert generator.budget_report['exhausted'] == 'time_limit', workers
+        assert isinstance(regex, str) and generator.budget_report['regex'] == regex
+        assert elapsed < 0.3 + 0.25, (workers, elapsed)
+
+def test_parse_without_append_trains_from_scratch():
+    from benchmark import generate_corpus, KEYS
+    inventory, interface = generate_corpus(30, 600, 4, kind='inventory'), generate_corpus(30, 600, 4, kind='interface')
+    generator, fresh = RegexGenerator(), RegexGenerator()
+    generator.parse_data(inventory, alternative_keys=KEYS)
+    generator.evolve(ignore_mid=False, check_mid=False)
+    generator.parse_data(interface, alternative_keys=KEYS)
+    fresh.parse_data(interface, alternative_keys=KEYS)
+    assert generator.evolve(ignore_mid=False, check_mid=False) == fresh.evolve(ignore_mid=False, check_mid=False)
+
+def test_warm_start_after_append_passes_on_all_entries():
+    from benchmark import generate_corpus, KEYS
+    corpus = generate_corpus(60, 600, 4, ambiguity=0.2)
+    generator = RegexGenerator()
+    generator.parse_data(corpus[:30], alternative_keys=KEYS)
+    assert isinstance(generator.evolve(ignore_mid=False, check_mid=False), str)
+    trained = len(generator.left_regex_builder)
+    generator.parse_data(corpus[30:], alternative_keys=KEYS, append=True)
+    assert generator.trained_entries < len(generator.data_entries)
+    regex = generator.evolve(ignore_mid=False, check_mid=False)
+    assert len(generator.left_regex_builder) >= trained
+    assert generator.trained_entries == len(generator.data_entries)
+    assert generator.evaluate_pattern(regex)
+
+def test_save_state_load_state_round_trip(tmp_path):
+    from benchmark import generate_corpus, KEYS
+    corpus = generate_corpus(30, 600, 4)
+    generator = RegexGenerator()
+    generator.parse_data(corpus, alternative_keys=KEYS)
+    regex = generator.evolve(ignore_mid=False, check_mid=False)
+    builders = lambda generator: [[(part.char, part.options) for part in builder] for builder in (generator.left_regex_builder, generator.mid_regex_builder, generator.right_regex_builder)]
+    for with_data in [True, False]:
+        path = str(tmp_path / f'state_{with_data}.json.gz')
+        generator.save_state(path, with_data=with_data)
+        loaded = RegexGenerator()
+        if not with_data: # entries parsed first are treated as new ones by ``warm_start``
+            loaded.parse_data(corpus, alternative_keys=KEYS)
+        loaded.load_state(path)
+        assert builders(loaded) == builders(generator)
+        assert [entry.selection for entry in loaded.data_entries] == [entry.selection for entry in generator.data_entries]
+        assert loaded.train_part_end_index == generator.train_part_end_index
+        assert loaded.evolve(ignore_mid=False, check_mid=False) == regex
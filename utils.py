@@ -1,2 +1,64 @@
+from collections import OrderedDict
+import threading
+
 def listmap(function, iterable):
-    return list(map(function, iterable))
\ No newline at end of file
+    return list(map(function, iterable))
+
+class LRUCache:
+    r"""Bounded mapping that evicts least recently used keys and counts hits and misses. All operations are guarded by a lock, so one cache can be shared by threads"""
+
+    def __init__(self, maxsize = 1024):
+        r"""
+        LRUCache initializer
+
+        Arguments:
+
+        maxsize (int, optional): maximal number of stored keys. (default: 1024)
+        """
+        self.maxsize = maxsize
+        self.data = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.data)
+
+    def __contains__(self, key):
+        return key in self.data
+
+    def get(self, key, default = None):
+        r"""Returns value stored for ``key`` and marks it as recently used or ``default`` if it is not present"""
+        with self.lock:
+            try:
+                value = self.data[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            self.data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        r"""Stores ``value`` for ``key`` evicting least recently used keys if ``maxsize`` is exceeded"""
+        with self.lock:
+            self.data[key] = value
+            self.data.move_to_end(key)
+            while len(self.data) > self.maxsize:
+                self.data.popitem(last=False)
+
+    def items(self):
+        r"""Returns list of (key, value) pairs, least recently used first"""
+        with self.lock:
+            return list(self.data.items())
+
+    def clear(self):
+        r"""Removes all keys and resets statistics"""
+        with self.lock:
+            self.data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        r"""Returns dictionary with ``hits``, ``misses``, ``size`` and ``maxsize`` of cache"""
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self.data), 'maxsize': self.maxsize}